@@ -0,0 +1,58 @@
+"""
+Measures the peak memory used to aggregate a following's alerts in the alert category report, comparing the previous
+approach (materializing all alerts in a list before aggregating) with aggregating them as they're retrieved. Alerts
+are generated lazily one page at a time, like the SDK iterators do.
+
+Usage: python -m benchmark.category_report_memory [number of alerts ...]
+"""
+
+import sys
+import tracemalloc
+from typing import Dict, Iterator
+
+from src.bin.alerts import get_following_categories
+
+PAGE_SIZE = 1000
+TAGS = ["CIS", "LGPD", "PCI", "ISO27001", "NIST", "SOC2"]
+STATES = ["OPEN", "IN_PROGRESS", "CLOSED", "RISK_ACCEPTED"]
+
+
+def iter_alerts(count: int) -> Iterator[Dict]:
+    for start in range(0, count, PAGE_SIZE):
+        page = [
+            {
+                "id": f"{i:032x}",
+                "state": STATES[i % len(STATES)],
+                "tags": TAGS[i % len(TAGS) : i % len(TAGS) + 2],
+                "title": f"Alert number {i} with a reasonably long descriptive title",
+            }
+            for i in range(start, min(start + PAGE_SIZE, count))
+        ]
+        yield from page
+
+
+def peak(func) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(counts) -> None:
+    print(f"{'alerts':>10} {'list (previous)':>16} {'streaming':>12}")
+    for count in counts:
+        materialized = peak(
+            lambda: get_following_categories(
+                [alert for alert in iter_alerts(count)], {}
+            )
+        )
+        streaming = peak(lambda: get_following_categories(iter_alerts(count), {}))
+        print(
+            f"{count:>10} {materialized / 2**20:>14.1f}MB {streaming / 2**20:>10.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    run([int(n) for n in sys.argv[1:]] or [10000, 100000, 500000])
@@ -0,0 +1,67 @@
+"""
+Compares the cost of serializing alerts with the standard library json module (the previous output path) against the
+pluggable JSON backend, for both indented (json) and compact (jsonl) output.
+
+Usage: python -m benchmark.json_serializer [number of alerts]
+"""
+
+import json
+import sys
+from timeit import timeit
+from uuid import uuid4
+
+import src.config.sdk as sdk_config
+from src.lib.json_backend import json_dumps, orjson_available
+from src.lib.models import JSONBackend
+
+
+def make_alert(i: int) -> dict:
+    return {
+        "id": str(uuid4()),
+        "cursor": f"{i:016d}",
+        "scanTargetId": str(uuid4()),
+        "organizationId": str(uuid4()),
+        "rule": f"rule-{i % 300}",
+        "title": f"Alert number {i} with a reasonably long descriptive title",
+        "state": "OPEN",
+        "severity": "HIGH",
+        "tags": ["CIS", "LGPD", "PCI"],
+        "labels": [],
+        "resource": f"arn:aws:s3:::bucket-{i}",
+        "metadata": {"region": "us-east-1", "count": i, "public": i % 2 == 0},
+        "createdAt": "2024-01-01T00:00:00.000Z",
+        "updatedAt": "2024-01-02T00:00:00.000Z",
+    }
+
+
+def run(count: int) -> None:
+    alerts = [make_alert(i) for i in range(count)]
+    print(f"{count} alerts, orjson available: {orjson_available()}")
+
+    cases = {
+        "json  stdlib (previous)": lambda: [json.dumps(a, indent=4) for a in alerts],
+        "jsonl stdlib (previous)": lambda: [
+            json.dumps(a, separators=(",", ":")) for a in alerts
+        ],
+    }
+    for backend in JSONBackend:
+        if backend is not JSONBackend.STDLIB and not orjson_available():
+            continue
+
+        def indented(backend=backend):
+            sdk_config.json_backend = backend
+            return [json_dumps(a, indent=4) for a in alerts]
+
+        def compact(backend=backend):
+            sdk_config.json_backend = backend
+            return [json_dumps(a) for a in alerts]
+
+        cases[f"json  {backend.value}"] = indented
+        cases[f"jsonl {backend.value}"] = compact
+
+    for name, case in cases.items():
+        print(f"{name:<26} {timeit(case, number=5) / 5:.4f}s")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,198 @@
+"""
+Measures how long the zanshin entry point (zanshincli.main:main_app) takes to start: cold, with no bytecode cache so
+that every module is compiled, and warm, with the cache in place. Also reports the modules with the highest import
+cost according to python -X importtime. Exits with status 1 when any median time goes over its budget in
+startup_budgets.json, so changes that slow startup down are caught.
+
+Budgets are ratios to the time a process importing typer takes, measured the same way in runs alternating with those
+of each command, rather than absolute times, so that they hold on machines of different speeds and under the varying
+load of shared CI runners.
+
+Commands that call the API run in full against a client whose requests are answered with a canned response, so the
+time to build the client, fetch and output the entries is measured without network access.
+
+Usage: python -m benchmark.startup [runs per command] [budgets file]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).parent.parent
+DEFAULT_BUDGETS = Path(__file__).parent / "startup_budgets.json"
+
+COMMANDS = {
+    "help": ["--help"],
+    "version": ["version"],
+    "organization list": ["organization", "list"],
+    "scan_target onboard": ["organization", "scan_target", "onboard_aws", "--help"],
+}
+
+ENTRY_POINT = (
+    "import sys\n"
+    "from zanshincli.main import main_app\n"
+    "sys.argv[0] = 'zanshin'\n"
+    "main_app()\n"
+)
+
+# responses of the API to the commands that call it, passed to the entry point in RESPONSE_VARIABLE
+API_RESPONSES = {
+    "organization list": [
+        {"id": f"00000000-0000-0000-0000-{index:012d}", "name": f"Organization {index}"}
+        for index in range(50)
+    ],
+}
+RESPONSE_VARIABLE = "ZANSHIN_BENCHMARK_RESPONSE"
+API_ENTRY_POINT = (
+    "import os\n"
+    "import httpx\n"
+    "from zanshinsdk.client import Client\n"
+    f"response = httpx.Response(200, content=os.environ['{RESPONSE_VARIABLE}'])\n"
+    "Client._request = lambda self, *args, **kwargs: response\n" + ENTRY_POINT
+)
+
+
+# what every command is compared to: the interpreter starting and importing the CLI framework
+BASELINE = "import typer"
+
+
+def environment(name: str) -> Dict[str, str]:
+    """
+    :return: the environment to run a command in, with the canned API response of the command if it calls the API
+    """
+    env = dict(os.environ)
+    if name in API_RESPONSES:
+        env[RESPONSE_VARIABLE] = json.dumps(API_RESPONSES[name])
+        env["ZANSHIN_API_KEY"] = "benchmark"
+    return env
+
+
+def run_once(
+    args: List[str], env: Dict[str, str], importtime: bool = False, code: str = ""
+) -> Tuple[float, str]:
+    """
+    :param code: the code to run, the entry point by default
+    :return: the wall time of a run of the entry point, in seconds, and what it wrote to stderr
+    """
+    if not code:
+        code = API_ENTRY_POINT if RESPONSE_VARIABLE in env else ENTRY_POINT
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", code, *args]
+    start = perf_counter()
+    result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+    elapsed = perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"zanshin {' '.join(args)} failed: {result.stderr}")
+    return elapsed, result.stderr
+
+
+def _command(name: str) -> Tuple[List[str], str]:
+    # the arguments and code to run for a command or the baseline
+    return ([], BASELINE) if name == BASELINE else (COMMANDS[name], "")
+
+
+def cold(name: str) -> float:
+    # an empty bytecode cache, so every module is compiled again
+    args, code = _command(name)
+    with tempfile.TemporaryDirectory() as cache:
+        env = {**environment(name), "PYTHONPYCACHEPREFIX": cache}
+        return run_once(args, env, code=code)[0]
+
+
+def warm(name: str) -> float:
+    args, code = _command(name)
+    return run_once(args, environment(name), code=code)[0]
+
+
+def measure(name: str, start: Callable[[str], float], runs: int) -> Tuple[float, float]:
+    """
+    Runs of the command alternate with runs of the baseline, so that both are measured under the same load
+    :param start: cold or warm
+    :return: the median time of the command, in seconds, and the median ratio of its time to the baseline
+    """
+    if start is warm:
+        warm(BASELINE)
+        warm(name)
+    times, ratios = [], []
+    for _ in range(runs):
+        baseline = start(BASELINE)
+        times.append(start(name))
+        ratios.append(times[-1] / baseline)
+    return median(times), median(ratios)
+
+
+def import_costs(name: str) -> List[Tuple[int, int, str]]:
+    """
+    :return: the cumulative and self import time in microseconds of each module imported, most expensive first
+    """
+    _, stderr = run_once(COMMANDS[name], environment(name), importtime=True)
+    costs = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        if own.strip().isdigit():
+            costs.append((int(cumulative), int(own), name.strip()))
+    return sorted(costs, reverse=True)
+
+
+def check(
+    name: str,
+    kind: str,
+    seconds: float,
+    ratio: float,
+    budgets: Dict[str, Dict[str, float]],
+) -> Optional[str]:
+    """
+    :return: a message if the time is over the budget of the command, None otherwise
+    """
+    budget = budgets.get(name, {}).get(kind)
+    print(
+        f"  {kind:<5} {seconds * 1000:8.0f}ms {ratio:5.2f}x"
+        + (f" (budget {budget:.2f}x)" if budget is not None else "")
+    )
+    if budget is not None and ratio > budget:
+        return (
+            f"{name} {kind} start took {seconds * 1000:.0f}ms, {ratio:.2f} times the baseline, over its budget of "
+            f"{budget:.2f} times"
+        )
+    return None
+
+
+def run(runs: int, budgets_file: Path) -> int:
+    budgets = json.loads(budgets_file.read_text()) if budgets_file.exists() else {}
+    print(f"times relative to python -c '{BASELINE}'")
+    failures = []
+    for name, args in COMMANDS.items():
+        print(f"zanshin {' '.join(args)}")
+        for kind, start in (("cold", cold), ("warm", warm)):
+            failure = check(name, kind, *measure(name, start, runs), budgets)
+            if failure:
+                print(f"  {failure}")
+                failures.append(failure)
+
+    print("\nmost expensive imports of zanshin organization list, cumulative and self")
+    for cumulative, own, module in import_costs("organization list")[:20]:
+        print(f"  {cumulative / 1000:8.1f}ms {own / 1000:8.1f}ms {module}")
+
+    if failures:
+        print(f"\n{len(failures)} startup budget(s) exceeded", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(
+        run(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 5,
+            Path(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_BUDGETS,
+        )
+    )
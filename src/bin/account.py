@@ -1,7 +1,7 @@
 import typer
-from zanshinsdk import Client
 
 import src.config.sdk as sdk_config
+from src.lib.client import get_client
 from src.lib.utils import dump_json
 
 ###################################################
@@ -17,7 +17,7 @@ def account_me():
     Returns the details of the user account that owns the API key used by this Connection instance
     """
 
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     try:
         dump_json(client.get_me())
     except Exception as e:
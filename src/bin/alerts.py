@@ -1,6 +1,9 @@
 from collections import defaultdict
-from json import dumps
-from typing import Dict, Iterator, List, Optional
+from contextlib import ExitStack
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 from uuid import UUID
 
 import typer
@@ -13,16 +16,78 @@ from zanshinsdk import (
     Languages,
     SortOpts,
 )
-from zanshinsdk.alerts_history import FilePersistentAlertsIterator
-from zanshinsdk.following_alerts_history import FilePersistentFollowingAlertsIterator
+from zanshinsdk.client import CONFIG_DIR
 
 import src.config.sdk as sdk_config
-from src.lib.models import AlertStateSetable
-from src.lib.utils import output_iterable
+from src.lib.alert_mirror import AlertMirror, default_mirror_path
+from src.lib.category_snapshot import CategorySnapshot, alert_categories
+from src.lib.client import get_client
+from src.lib.models import AlertStateSetable, OutputFormat
+from src.lib.paging import (
+    MAX_PAGE_SIZE,
+    history_page,
+    iter_entries,
+    list_page_size,
+    page_fetcher,
+)
+from src.lib.partition import (
+    api_timestamp,
+    parse_partition,
+    partitioned,
+    time_windows,
+)
+from src.lib.persistence import (
+    DEFAULT_CHECKPOINT_EVERY,
+    LEGACY_STATE_FILE,
+    AtomicFilePersistentAlertsIterator,
+    AtomicFilePersistentFollowingAlertsIterator,
+    HistoryShard,
+    StateFileLockedError,
+    adopt_legacy_state,
+    default_state_path,
+    shard_ids,
+    state_file_lock,
+)
+from src.lib.pipeline import map_ordered, merge, prefetch_pages
+from src.lib.ratelimit import retry_on_rate_limit
+from src.lib.utils import dump_json, output_iterable
+
+# same page sizes used by the SDK's iter_alerts, iter_following_alerts, iter_alerts_history, iter_grouped_alerts,
+# iter_alert_history and iter_alert_comments
+ALERTS_PAGE_SIZE: int = 1000
+FOLLOWING_ALERTS_PAGE_SIZE: int = 100
+HISTORY_PAGE_SIZE: int = 100
+GROUPED_ALERTS_PAGE_SIZE: int = 100
+ALERT_HISTORY_PAGE_SIZE: int = 100
+COMMENTS_PAGE_SIZE: int = 100
 
 app = typer.Typer()
 
 
+def with_comments(
+    client: Client, alerts: Iterator[Dict], concurrency: int
+) -> Iterator[Dict]:
+    """
+    Adds the comments of each alert to it, retrieving comments for up to concurrency alerts in parallel while keeping
+    the order of the alerts
+    :param client: the Zanshin SDK client
+    :param alerts: the alerts to add comments to
+    :param concurrency: number of alerts to retrieve comments for in parallel
+    :return: an iterator over the alerts, with a comments field
+    """
+
+    def add_comments(alert: Dict) -> Dict:
+        alert["comments"] = [
+            comment["comment"]
+            for comment in client.iter_alert_comments(
+                alert["id"], page_size=list_page_size(COMMENTS_PAGE_SIZE)
+            )
+        ]
+        return alert
+
+    return map_ordered(add_comments, alerts, concurrency)
+
+
 @app.command(name="list")
 def alert_list(
     organization_id: UUID = typer.Argument(..., help="UUID of the organization"),
@@ -90,18 +155,75 @@ def alert_list(
     comments: bool = typer.Option(
         False, "--comments", help="Retrieve alerts with their comments"
     ),
+    comments_concurrency: int = typer.Option(
+        4,
+        min=1,
+        help="Number of alerts to retrieve comments for in parallel when using --comments",
+    ),
+    read_ahead: int = typer.Option(
+        0,
+        min=0,
+        help="Request up to this many pages ahead while the current one is being output, 0 disables read-ahead",
+    ),
+    local: bool = typer.Option(
+        False,
+        "--local",
+        help="List alerts from the local copy kept by 'alert sync' instead of the API",
+    ),
+    mirror_file: Optional[Path] = typer.Option(
+        None,
+        help="SQLite file with the local copy of the alerts used by --local, defaults to the one used by 'alert sync'",
+    ),
+    partition_by: Optional[str] = typer.Option(
+        None,
+        help="Split the date range of a field into windows listed concurrently, in the format FIELD:DURATION, e.g. "
+        "created_at:1d. FIELD is created_at, updated_at, opened_at or resolved_at, and its start date must be given. "
+        "Unless alerts are ordered on FIELD, all windows are retrieved before any alert is output",
+    ),
+    partition_concurrency: int = typer.Option(
+        4, min=1, help="Number of windows listed at the same time with --partition-by"
+    ),
 ):
     """
     List alerts from a given organization, with optional filters by scan target, state or severity.
     """
-    client = Client(profile=sdk_config.profile)
+    if partition_by and (local or cursor):
+        raise typer.BadParameter(
+            "--partition-by can't be used with --local or --cursor"
+        )
+    if local:
+        return _alert_list_local(
+            mirror_file or default_mirror_path(organization_id),
+            organization_id,
+            cursor=cursor,
+            comments=comments,
+            comments_concurrency=comments_concurrency,
+            scan_target_ids=scan_target_ids,
+            scan_target_tags=scan_target_tags,
+            include_empty_scan_target_tags=include_empty_scan_target_tags,
+            order=order,
+            rules=rules,
+            states=states,
+            severities=severities,
+            opened_at_start=opened_at_start,
+            opened_at_end=opened_at_end,
+            resolved_at_start=resolved_at_start,
+            resolved_at_end=resolved_at_end,
+            created_at_start=created_at_start,
+            created_at_end=created_at_end,
+            updated_at_start=updated_at_start,
+            updated_at_end=updated_at_end,
+            search=search,
+            sort=sort,
+        )
 
-    alerts = client.iter_alerts(
+    client = get_client(sdk_config.profile)
+
+    filters = dict(
         organization_id=organization_id,
         scan_target_ids=scan_target_ids,
         scan_target_tags=scan_target_tags,
         include_empty_scan_target_tags=include_empty_scan_target_tags,
-        cursor=cursor,
         order=order,
         rules=rules,
         states=states,
@@ -118,16 +240,171 @@ def alert_list(
         search=search,
         sort=sort,
     )
+    if partition_by:
+        alerts = _partitioned_alerts(
+            client, filters, partition_by, partition_concurrency
+        )
+    elif read_ahead or sdk_config.auto_page_size:
+        fetch_page = page_fetcher(
+            lambda page_cursor, page_size: client._get_alerts_page(
+                cursor=page_cursor, page_size=page_size, **filters
+            ),
+            ALERTS_PAGE_SIZE,
+        )
+        if read_ahead:
+            alerts = prefetch_pages(fetch_page, read_ahead, cursor, sdk_config.limit)
+        else:
+            alerts = iter_entries(fetch_page, cursor)
+    else:
+        alerts = client.iter_alerts(
+            cursor=cursor, page_size=list_page_size(ALERTS_PAGE_SIZE), **filters
+        )
 
-    def alerts_with_comments():
-        for alert in alerts:
-            alert["comments"] = [
-                comment["comment"]
-                for comment in client.iter_alert_comments(alert["id"])
-            ]
-            yield alert
+    output_iterable(
+        with_comments(client, alerts, comments_concurrency) if comments else alerts
+    )
 
-    output_iterable(alerts_with_comments() if comments else alerts)
+
+def _partitioned_alerts(
+    client: Client, filters: Dict, partition_by: str, concurrency: int
+) -> Iterator[Dict]:
+    """
+    Lists alerts splitting the date range of the partition field into windows listed concurrently
+    """
+    try:
+        field, step = parse_partition(partition_by)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+    start = filters[f"{field}_start"]
+    if not start:
+        raise typer.BadParameter(
+            f"--partition-by {field} requires --{field.replace('_', '-')}-start"
+        )
+    windows = time_windows(start, filters[f"{field}_end"], step)
+
+    def fetch(window_start: str, window_end: str) -> Iterator[Dict]:
+        window_filters = {
+            **filters,
+            f"{field}_start": window_start,
+            f"{field}_end": window_end,
+        }
+        if sdk_config.auto_page_size:
+            alerts = iter_entries(
+                page_fetcher(
+                    lambda page_cursor, page_size: client._get_alerts_page(
+                        cursor=page_cursor, page_size=page_size, **window_filters
+                    ),
+                    ALERTS_PAGE_SIZE,
+                )
+            )
+        else:
+            alerts = client.iter_alerts(
+                page_size=list_page_size(ALERTS_PAGE_SIZE), **window_filters
+            )
+        return alerts
+
+    return partitioned(
+        fetch,
+        field,
+        windows,
+        getattr(filters["order"], "value", filters["order"]),
+        getattr(filters["sort"], "value", filters["sort"]) == "DESC",
+        concurrency,
+        sdk_config.limit,
+    )
+
+
+def _alert_list_local(
+    mirror_file: Path,
+    organization_id: UUID,
+    cursor: Optional[str],
+    comments: bool,
+    comments_concurrency: int,
+    **filters,
+) -> None:
+    """
+    Lists alerts from the local copy of an organization's alerts, without requests to the API unless comments are
+    requested
+    """
+    if cursor:
+        raise typer.BadParameter(
+            "pagination cursors are not supported with --local", param_hint="--cursor"
+        )
+    if not mirror_file.is_file():
+        raise typer.BadParameter(
+            f"{mirror_file} not found, run 'zanshin alert sync {organization_id}' first",
+            param_hint="--mirror-file",
+        )
+    for name, value in filters.items():
+        if name.endswith(("_start", "_end")) and value:
+            try:
+                api_timestamp(value)
+            except ValueError:
+                raise typer.BadParameter(
+                    f"invalid date {value}, expected YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS",
+                    param_hint=f"--{name.replace('_', '-')}",
+                )
+    with AlertMirror(mirror_file, organization_id) as mirror:
+        alerts = mirror.query(**filters)
+        if comments:
+            client = get_client(sdk_config.profile)
+            alerts = with_comments(client, alerts, comments_concurrency)
+        output_iterable(alerts)
+
+
+@app.command(name="sync")
+def alert_sync(
+    organization_id: UUID = typer.Argument(..., help="UUID of the organization"),
+    mirror_file: Optional[Path] = typer.Option(
+        None,
+        help="SQLite file keeping the local copy of the alerts, defaults to one per organization in ~/.tenchi/mirror",
+    ),
+    full: bool = typer.Option(
+        False, "--full", help="Discard the local copy and retrieve all alerts again"
+    ),
+):
+    """
+    Updates a local copy of the alerts of an organization, retrieving only alerts updated since the last sync.
+    """
+    client = get_client(sdk_config.profile)
+    with AlertMirror(
+        mirror_file or default_mirror_path(organization_id), organization_id
+    ) as mirror:
+        if full:
+            mirror.reset()
+        # oldest updates first, so that an interrupted sync resumes from the last batch stored
+        filters = dict(
+            organization_id=organization_id,
+            states=[state for state in AlertState if state != AlertState.ACTIVE],
+            updated_at_start=mirror.watermark,
+            order=AlertsOrderOpts.UPDATED_AT,
+            sort=SortOpts.ASC,
+        )
+        if sdk_config.auto_page_size:
+            alerts = iter_entries(
+                page_fetcher(
+                    lambda page_cursor, page_size: client._get_alerts_page(
+                        cursor=page_cursor, page_size=page_size, **filters
+                    ),
+                    ALERTS_PAGE_SIZE,
+                )
+            )
+        else:
+            alerts = client.iter_alerts(
+                page_size=list_page_size(ALERTS_PAGE_SIZE), **filters
+            )
+        sdk_config.entries = mirror.upsert(alerts)
+        mirror.replace_scan_targets(
+            client.iter_organization_scan_targets(organization_id)
+        )
+        dump_json(
+            {
+                "organizationId": str(organization_id),
+                "updated": sdk_config.entries,
+                "total": mirror.count(),
+                "watermark": mirror.watermark,
+            }
+        )
 
 
 @app.command(name="list_following")
@@ -197,17 +474,26 @@ def alert_following_list(
     comments: bool = typer.Option(
         False, "--comments", help="Retrieve alerts with their comments"
     ),
+    comments_concurrency: int = typer.Option(
+        4,
+        min=1,
+        help="Number of alerts to retrieve comments for in parallel when using --comments",
+    ),
+    read_ahead: int = typer.Option(
+        0,
+        min=0,
+        help="Request up to this many pages ahead while the current one is being output, 0 disables read-ahead",
+    ),
 ):
     """
     List following alerts from a given organization, with optional filters by following ids, state or severity.
     """
-    client = Client(profile=sdk_config.profile)
-    alerts = client.iter_following_alerts(
+    client = get_client(sdk_config.profile)
+    filters = dict(
         organization_id=organization_id,
         following_ids=following_ids,
         following_tags=following_tags,
         include_empty_following_tags=include_empty_following_tags,
-        cursor=cursor,
         order=order,
         rules=rules,
         states=states,
@@ -224,16 +510,222 @@ def alert_following_list(
         search=search,
         sort=sort,
     )
+    if read_ahead or sdk_config.auto_page_size:
+        fetch_page = page_fetcher(
+            lambda page_cursor, page_size: client._get_following_alerts_page(
+                cursor=page_cursor, page_size=page_size, **filters
+            ),
+            FOLLOWING_ALERTS_PAGE_SIZE,
+        )
+        if read_ahead:
+            alerts = prefetch_pages(fetch_page, read_ahead, cursor, sdk_config.limit)
+        else:
+            alerts = iter_entries(fetch_page, cursor)
+    else:
+        alerts = client.iter_following_alerts(
+            cursor=cursor,
+            page_size=list_page_size(FOLLOWING_ALERTS_PAGE_SIZE),
+            **filters,
+        )
+
+    output_iterable(
+        with_comments(client, alerts, comments_concurrency) if comments else alerts
+    )
+
+
+def _persistent_history(
+    iterator_class,
+    command: str,
+    client: Client,
+    organization_id: UUID,
+    filter_ids: Optional[List[UUID]],
+    cursor: Optional[str],
+    state_file: Optional[Path],
+    checkpoint_every: int,
+    iter_history: Callable[..., Iterator[Dict]],
+) -> None:
+    """
+    Outputs the alert history of an organization through a persistent iterator, holding a lock on its state file so
+    that concurrent exports of the same alerts don't overwrite each other's cursor. The iterator retrieves the alerts
+    with iter_history, called with the client, organization ID, filter IDs and cursor
+    """
+    # sorted for both the state file and the iterator, which requires the IDs in the order they were saved in
+    filter_ids = sorted(str(filter_id) for filter_id in filter_ids or [])
+    path = state_file or default_state_path(command, organization_id, filter_ids)
+    try:
+        with state_file_lock(path):
+            if not state_file and adopt_legacy_state(
+                path, iterator_class.field_name, organization_id, filter_ids
+            ):
+                typer.echo(
+                    f"zanshin: resuming from ./{LEGACY_STATE_FILE}, the state is now kept in {path}",
+                    err=True,
+                )
+            iter_alerts = iterator_class(
+                str(path),
+                filter_ids,
+                client=client,
+                organization_id=organization_id,
+                cursor=cursor,
+                iter_history=partial(iter_history, client),
+            )
+            output_iterable(
+                iter_alerts, None, iter_alerts.save, checkpoint_every=checkpoint_every
+            )
+    except StateFileLockedError as e:
+        typer.echo(str(e), err=True)
+        raise typer.Exit(code=1)
+
+
+def _sharded_history(
+    client: Client,
+    organization_id: UUID,
+    scan_target_ids: List[UUID],
+    shards: int,
+    shard_dir: Optional[Path],
+    persist: bool,
+    checkpoint_every: int,
+) -> None:
+    """
+    Outputs the alert history of an organization split by scan target into shards, each retrieved by its own cursor
+    stream on its own thread. Alerts are either merged into the output as they arrive, or written to a file per shard
+    """
+    groups = shard_ids(scan_target_ids, shards)
+
+    with ExitStack() as stack:
+        states: List[Optional[HistoryShard]] = [None] * len(groups)
+        if persist:
+            for i, group in enumerate(groups):
+                path = default_state_path("list_history", organization_id, group)
+                try:
+                    stack.enter_context(state_file_lock(path))
+                except StateFileLockedError as e:
+                    typer.echo(str(e), err=True)
+                    raise typer.Exit(code=1)
+                states[i] = HistoryShard(path, organization_id, group)
+
+        def stream(i: int) -> Iterator[Dict]:
+            alerts = _alerts_history(
+                client,
+                organization_id,
+                groups[i],
+                states[i].cursor if states[i] else None,
+            )
+            # no shard contributes more alerts than the limit to the output
+            return islice(alerts, sdk_config.limit) if sdk_config.limit else alerts
+
+        def save() -> None:
+            for state in states:
+                state.save()
+
+        if shard_dir:
+            shard_dir.mkdir(parents=True, exist_ok=True)
+
+            def export(i: int) -> None:
+                path = shard_dir / f"shard-{i}.{sdk_config.format.value}"
+                with open(path, "a" if persist else "w", encoding="utf-8") as f:
+                    output_iterable(
+                        _tracking_cursor(stream(i), states[i]),
+                        None,
+                        states[i].save if persist else None,
+                        checkpoint_every=checkpoint_every,
+                        file=f,
+                    )
+
+            for _ in map_ordered(export, range(len(groups)), len(groups)):
+                pass
+        else:
+
+            def merged() -> Iterator[Dict]:
+                # a page per shard can be retrieved ahead of the output
+                for i, alert in merge(
+                    [stream(i) for i in range(len(groups))],
+                    HISTORY_PAGE_SIZE * len(groups),
+                ):
+                    if states[i]:
+                        states[i].cursor = alert["cursor"]
+                    yield alert
+
+            output_iterable(
+                merged(),
+                None,
+                save if persist else None,
+                checkpoint_every=checkpoint_every,
+            )
+
+
+def _alerts_history(
+    client: Client,
+    organization_id: Union[UUID, str],
+    scan_target_ids: Optional[List[Union[UUID, str]]],
+    cursor: Optional[str],
+) -> Iterator[Dict]:
+    """
+    :return: the alert history of an organization, requested with the page size given by --page-size
+    """
+    if sdk_config.auto_page_size:
+        return iter_entries(
+            page_fetcher(
+                lambda page_cursor, page_size: history_page(
+                    client._get_alerts_history_page(
+                        organization_id=organization_id,
+                        scan_target_ids=scan_target_ids,
+                        cursor=page_cursor,
+                        page_size=page_size,
+                    )
+                ),
+                HISTORY_PAGE_SIZE,
+            ),
+            cursor,
+        )
+    return client.iter_alerts_history(
+        organization_id=organization_id,
+        scan_target_ids=scan_target_ids,
+        cursor=cursor,
+        page_size=list_page_size(HISTORY_PAGE_SIZE),
+    )
 
-    def alerts_with_comments():
-        for alert in alerts:
-            alert["comments"] = [
-                comment["comment"]
-                for comment in client.iter_alert_comments(alert["id"])
-            ]
-            yield alert
 
-    output_iterable(alerts_with_comments() if comments else alerts)
+def _following_alerts_history(
+    client: Client,
+    organization_id: Union[UUID, str],
+    following_ids: Optional[List[Union[UUID, str]]],
+    cursor: Optional[str],
+) -> Iterator[Dict]:
+    """
+    :return: the alert history of the followings of an organization, requested with the page size given by
+    --page-size
+    """
+    if sdk_config.auto_page_size:
+        return iter_entries(
+            page_fetcher(
+                lambda page_cursor, page_size: history_page(
+                    client._get_alerts_following_history_page(
+                        organization_id=organization_id,
+                        following_ids=following_ids,
+                        cursor=page_cursor,
+                        page_size=page_size,
+                    )
+                ),
+                HISTORY_PAGE_SIZE,
+            ),
+            cursor,
+        )
+    return client.iter_alerts_following_history(
+        organization_id=organization_id,
+        following_ids=following_ids,
+        cursor=cursor,
+        page_size=list_page_size(HISTORY_PAGE_SIZE),
+    )
+
+
+def _tracking_cursor(
+    alerts: Iterator[Dict], state: Optional[HistoryShard]
+) -> Iterator[Dict]:
+    for alert in alerts:
+        if state:
+            state.cursor = alert["cursor"]
+        yield alert
 
 
 @app.command(name="list_history")
@@ -244,28 +736,81 @@ def alert_history_list(
     ),
     cursor: Optional[str] = typer.Option(None, help="Cursor for pagination"),
     persist: Optional[bool] = typer.Option(False, help="Persist"),
+    checkpoint_every: int = typer.Option(
+        DEFAULT_CHECKPOINT_EVERY,
+        min=1,
+        help="With --persist, number of alerts output between updates of the state file. Alerts are delivered at "
+        "least once: an interrupted export resumes from the last update, so up to this many alerts may be output "
+        "again",
+    ),
+    state_file: Optional[Path] = typer.Option(
+        None,
+        help="With --persist, file keeping the export state, by default one per organization and filter under the "
+        "configuration directory (~/.tenchi/history). Exports started with the state in ./zanshin, where it was kept "
+        "before, resume from it",
+    ),
+    shards: int = typer.Option(
+        1,
+        min=1,
+        help="Split the scan targets given with --scan-target-id into this many shards, whose alert histories are "
+        "retrieved concurrently. With --persist, each shard keeps its own state file",
+    ),
+    shard_dir: Optional[Path] = typer.Option(
+        None,
+        file_okay=False,
+        help="With --shards, write the alerts of each shard to its own file in this directory instead of merging them "
+        "in the output. With --persist, files are appended to, which requires the json or jsonl format",
+    ),
 ):
     """
     List alerts from a given organization, with optional filters by scan target, state or severity
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
 
-    if persist:
-        iter_alerts = FilePersistentAlertsIterator(
-            filename="zanshin",
-            client=client,
-            organization_id=organization_id,
-            scan_target_ids=scan_target_id,
-            cursor=cursor,
+    if shards > 1 or shard_dir:
+        if cursor or state_file:
+            raise typer.BadParameter(
+                "--cursor and --state-file can't be used with --shards or --shard-dir"
+            )
+        if not scan_target_id:
+            # the current scan targets would leave out the history of deleted ones
+            raise typer.BadParameter(
+                "--shards and --shard-dir require the scan targets to be given",
+                param_hint="--scan-target-id",
+            )
+        if (
+            shard_dir
+            and persist
+            and sdk_config.format not in (OutputFormat.JSON, OutputFormat.JSONL)
+        ):
+            # resumed exports append to the shard files, which would repeat headers
+            raise typer.BadParameter(
+                "--shard-dir with --persist requires the json or jsonl format"
+            )
+        _sharded_history(
+            client,
+            organization_id,
+            scan_target_id,
+            shards,
+            shard_dir,
+            persist,
+            checkpoint_every,
+        )
+    elif persist:
+        _persistent_history(
+            AtomicFilePersistentAlertsIterator,
+            "list_history",
+            client,
+            organization_id,
+            scan_target_id,
+            cursor,
+            state_file,
+            checkpoint_every,
+            _alerts_history,
         )
-        output_iterable(iter_alerts, None, iter_alerts.save)
     else:
         output_iterable(
-            client.iter_alerts_history(
-                organization_id=organization_id,
-                scan_target_ids=scan_target_id,
-                cursor=cursor,
-            )
+            _alerts_history(client, organization_id, scan_target_id, cursor)
         )
 
 
@@ -277,28 +822,40 @@ def alert_history_following_list(
     ),
     cursor: Optional[str] = typer.Option(None, help="Cursor for pagination"),
     persist: Optional[bool] = typer.Option(False, help="Persist"),
+    checkpoint_every: int = typer.Option(
+        DEFAULT_CHECKPOINT_EVERY,
+        min=1,
+        help="With --persist, number of alerts output between updates of the state file. Alerts are delivered at "
+        "least once: an interrupted export resumes from the last update, so up to this many alerts may be output "
+        "again",
+    ),
+    state_file: Optional[Path] = typer.Option(
+        None,
+        help="With --persist, file keeping the export state, by default one per organization and filter under the "
+        "configuration directory (~/.tenchi/history). Exports started with the state in ./zanshin, where it was kept "
+        "before, resume from it",
+    ),
 ):
     """
     List alerts from a given organization, with optional filters by scan target, state or severity
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
 
     if persist:
-        iter_alerts = FilePersistentFollowingAlertsIterator(
-            filename="zanshin",
-            client=client,
-            organization_id=organization_id,
-            following_ids=following_ids,
-            cursor=cursor,
+        _persistent_history(
+            AtomicFilePersistentFollowingAlertsIterator,
+            "list_history_following",
+            client,
+            organization_id,
+            following_ids,
+            cursor,
+            state_file,
+            checkpoint_every,
+            _following_alerts_history,
         )
-        output_iterable(iter_alerts, None, iter_alerts.save)
     else:
         output_iterable(
-            client.iter_alerts_following_history(
-                organization_id=organization_id,
-                following_ids=following_ids,
-                cursor=cursor,
-            )
+            _following_alerts_history(client, organization_id, following_ids, cursor)
         )
 
 
@@ -370,10 +927,11 @@ def grouped_alert_list(
     """
     List grouped alerts from a given organization, with optional filters by scan target, state or severity.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     output_iterable(
         client.iter_grouped_alerts(
             organization_id=organization_id,
+            page_size=list_page_size(GROUPED_ALERTS_PAGE_SIZE),
             scan_target_ids=scan_target_ids,
             scan_tagert_tags=scan_target_tags,
             include_empty_scan_target_tags=include_empty_scan_target_tags,
@@ -465,10 +1023,11 @@ def grouped_alert_following_list(
     """
     List grouped following alerts from a given organization, with optional filters by scan target, state or severity.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     output_iterable(
         client.iter_grouped_following_alerts(
             organization_id=organization_id,
+            page_size=list_page_size(GROUPED_ALERTS_PAGE_SIZE),
             following_ids=following_ids,
             following_tags=following_tags,
             include_empty_following_tags=include_empty_following_tags,
@@ -502,14 +1061,22 @@ def alert_get(
     Returns details about a specified alert
     """
     if list_history:
-        client = Client(profile=sdk_config.profile)
-        output_iterable(client.iter_alert_history(alert_id))
+        client = get_client(sdk_config.profile)
+        output_iterable(
+            client.iter_alert_history(
+                alert_id, page_size=list_page_size(ALERT_HISTORY_PAGE_SIZE)
+            )
+        )
     elif list_comments:
-        client = Client(profile=sdk_config.profile)
-        output_iterable(client.iter_alert_comments(alert_id))
+        client = get_client(sdk_config.profile)
+        output_iterable(
+            client.iter_alert_comments(
+                alert_id, page_size=list_page_size(COMMENTS_PAGE_SIZE)
+            )
+        )
     else:
-        client = Client(profile=sdk_config.profile)
-        typer.echo(dumps(client.get_alert(alert_id), indent=4))
+        client = get_client(sdk_config.profile)
+        dump_json(client.get_alert(alert_id))
 
 
 @app.command(name="update")
@@ -534,7 +1101,7 @@ def alert_update(
     Updates the alert.
     """
 
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     typer.echo(
         client.update_alert(
             organization_id, scan_target_id, alert_id, state, labels, comment
@@ -580,7 +1147,7 @@ def batch_update_state(
     """
     Updates the state of multiple alerts in a batch.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     typer.echo(
         client.batch_update_alerts_state(
             organization_id=organization_id,
@@ -597,23 +1164,11 @@ def batch_update_state(
     )
 
 
-def get_following_categories(alerts: Iterator[Dict], global_categories: Dict):
-    categories = defaultdict(lambda: {"open": 0, "resolved": 0})
-    for alert in alerts:
-        if not alert.get("tags", []):
-            alert["tags"] = ["UNCATEGORIZED"]
-        resolved, opened = 0, 0
-        if alert["state"] in [AlertState.OPEN, AlertState.IN_PROGRESS]:
-            opened += 1
-        else:
-            resolved += 1
-        for tag in alert["tags"]:
-            tag = tag.upper()
-            categories[tag]["open"] += opened
-            categories[tag]["resolved"] += resolved
-        if global_categories.get("tag", -1) < 0:
-            global_categories[tag] = 0
-    final_categories = {
+def category_percentages(categories: Dict[str, Dict]) -> Dict:
+    """
+    Turns the open and resolved counters of each category into the percentage of resolved alerts
+    """
+    return {
         category: {
             "percentage": round(
                 (stats["resolved"] / (stats["resolved"] + stats["open"])) * 100, 2
@@ -621,7 +1176,16 @@ def get_following_categories(alerts: Iterator[Dict], global_categories: Dict):
         }
         for category, stats in categories.items()
     }
-    return final_categories
+
+
+def get_following_categories(alerts: Iterator[Dict], global_categories: Dict):
+    categories = defaultdict(lambda: {"open": 0, "resolved": 0})
+    for alert in alerts:
+        opened, tags = alert_categories(alert)
+        for tag in tags:
+            categories[tag]["open" if opened else "resolved"] += 1
+        global_categories.setdefault(tags[-1], 0)
+    return category_percentages(categories)
 
 
 def calculate_global_categories(
@@ -643,6 +1207,50 @@ def calculate_global_categories(
     return global_entry
 
 
+def _following_categories(
+    client: Client,
+    organization_id: UUID,
+    severities: Optional[List[AlertSeverity]],
+    snapshot: Optional[CategorySnapshot],
+    following: Dict,
+) -> Tuple[Dict, Dict]:
+    """
+    Computes the category report row of a single following. With a snapshot, only alerts updated since the previous
+    run are retrieved and applied to the stored counters
+    :return: the row, and the categories it contributes to the global average
+    """
+    global_categories = {}
+    # alerts are aggregated as they're retrieved, so memory depends on the number of tags and not of alerts
+    following_alerts = client.iter_following_alerts(
+        organization_id=organization_id,
+        following_ids=[following["id"]],
+        states=[
+            AlertState.OPEN,
+            AlertState.IN_PROGRESS,
+            AlertState.RISK_ACCEPTED,
+            AlertState.MITIGATING_CONTROL,
+            AlertState.FALSE_POSITIVE,
+            AlertState.CLOSED,
+        ],
+        updated_at_start=(
+            snapshot.high_water_mark(following["id"]) if snapshot else None
+        ),
+        page_size=list_page_size(MAX_PAGE_SIZE),
+        severities=severities,
+    )
+    if snapshot:
+        snapshot.apply(following["id"], following_alerts)
+        categories, last_tags = snapshot.categories(following["id"])
+        following_categories = category_percentages(categories)
+        global_categories.update({tag: 0 for tag in last_tags})
+    else:
+        following_categories = get_following_categories(
+            following_alerts, global_categories
+        )
+    following_categories.update({"ID": following["id"], "NAME": following["name"]})
+    return following_categories, global_categories
+
+
 @app.command(name="generate_alert_category_report")
 def generate_alert_category_report(
     organization_id: UUID = typer.Argument(..., help="UUID of the organization"),
@@ -654,38 +1262,60 @@ def generate_alert_category_report(
         help="Only list alerts with the specified severities",
         case_sensitive=False,
     ),
+    concurrency: int = typer.Option(
+        4, min=1, help="Number of followings to retrieve alerts from in parallel"
+    ),
+    max_retries: int = typer.Option(
+        5,
+        min=0,
+        help="Times to retry a following when the API rate limit is hit, waiting longer each time",
+    ),
+    incremental: bool = typer.Option(
+        False,
+        "--incremental",
+        help="Keep per following counters in a local snapshot and only retrieve alerts updated since the last run",
+    ),
+    snapshot_file: Path = typer.Option(
+        CONFIG_DIR / "alert_category_report.db",
+        help="Snapshot file used with --incremental",
+    ),
+    rebuild: bool = typer.Option(
+        False,
+        "--rebuild",
+        help="Discard the snapshot and retrieve all alerts again, e.g. to drop alerts that were deleted",
+    ),
 ):
-    client = Client(profile=sdk_config.profile)
+    """
+    Generates a report with the percentage of resolved alerts per category of each following, and the average of
+    all followings.
+    """
+    client = get_client(sdk_config.profile)
+    snapshot = None
+    if incremental:
+        snapshot = CategorySnapshot(
+            snapshot_file,
+            f"{organization_id}:{','.join(sorted(str(s.value) for s in severities or []))}",
+        )
+        if rebuild:
+            snapshot.reset()
     followings = [
         following
         for following in client.iter_organization_following(organization_id)
         if not following_ids or following["id"] in following_ids
     ]
+    following_categories = retry_on_rate_limit(
+        partial(_following_categories, client, organization_id, severities, snapshot),
+        max_retries,
+    )
     global_categories = {}
     followings_categories = []
-    for following in followings:
-        following_alerts = [
-            alerts
-            for alerts in client.iter_following_alerts(
-                organization_id=organization_id,
-                following_ids=[following["id"]],
-                states=[
-                    AlertState.OPEN,
-                    AlertState.IN_PROGRESS,
-                    AlertState.RISK_ACCEPTED,
-                    AlertState.MITIGATING_CONTROL,
-                    AlertState.FALSE_POSITIVE,
-                    AlertState.CLOSED,
-                ],
-                page_size=1000,
-                severities=severities,
-            )
-        ]
-        following_categories = get_following_categories(
-            following_alerts, global_categories
-        )
-        following_categories.update({"ID": following["id"], "NAME": following["name"]})
-        followings_categories.append(following_categories)
+    # results come back in the order of the followings, so the report matches a sequential run
+    for categories, following_global_categories in map_ordered(
+        following_categories, followings, concurrency
+    ):
+        for category in following_global_categories:
+            global_categories.setdefault(category, 0)
+        followings_categories.append(categories)
     if followings_categories:
         followings_categories.insert(
             0, calculate_global_categories(global_categories, followings_categories)
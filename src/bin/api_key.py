@@ -1,9 +1,9 @@
 from uuid import UUID
 
 import typer
-from zanshinsdk import Client
 
 import src.config.sdk as sdk_config
+from src.lib.client import get_client
 from src.lib.utils import dump_json, output_iterable
 
 app = typer.Typer()
@@ -14,7 +14,7 @@ def account_api_key_list():
     """
     Iterates over the API keys of current logged user.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     output_iterable(client.iter_api_keys())
 
 
@@ -26,7 +26,7 @@ def account_api_key_create(
     Creates a new API key for the current logged user, API Keys can be used to interact with the zanshin api directly
     a behalf of that user.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(client.create_api_key(name))
 
 
@@ -37,5 +37,5 @@ def account_api_key_delete(
     """
     Deletes a given API key by its id, it will only work if the informed ID belongs to the current logged user.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(client.delete_api_key(api_key_id))
@@ -1,9 +1,9 @@
 from uuid import UUID
 
 import typer
-from zanshinsdk import Client
 
 import src.config.sdk as sdk_config
+from src.lib.client import get_client
 from src.lib.utils import dump_json, output_iterable
 
 app = typer.Typer()
@@ -16,7 +16,7 @@ def organization_follower_list(
     """
     Lists the followers of organization this user has direct access to.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     output_iterable(client.iter_organization_followers(organization_id))
 
 
@@ -30,7 +30,7 @@ def organization_follower_stop(
     """
     Stops one organization follower of another.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.stop_organization_follower(organization_id, organization_follower_id)
     )
@@ -1,9 +1,9 @@
 from uuid import UUID
 
 import typer
-from zanshinsdk import Client
 
 import src.config.sdk as sdk_config
+from src.lib.client import get_client
 from src.lib.utils import dump_json, output_iterable
 
 app = typer.Typer()
@@ -16,7 +16,7 @@ def organization_follower_request_list(
     """
     Lists the follower requests of organization this user has direct access to.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     output_iterable(client.iter_organization_followers(organization_id))
 
 
@@ -28,7 +28,7 @@ def organization_follower_request_create(
     """
     Create organization follower request.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(client.create_organization_follower_request(organization_id, token))
 
 
@@ -40,7 +40,7 @@ def organization_follower_request_get(
     """
     Get organization follower request.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(client.get_organization_follower_request(organization_id, token))
 
 
@@ -52,5 +52,5 @@ def organization_follower_request_delete(
     """
     Delete organization follower request.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(client.delete_organization_follower_request(organization_id, token))
@@ -1,9 +1,9 @@
 from uuid import UUID
 
 import typer
-from zanshinsdk import Client
 
 import src.config.sdk as sdk_config
+from src.lib.client import get_client
 from src.lib.utils import dump_json, output_iterable
 
 app = typer.Typer()
@@ -16,7 +16,7 @@ def organization_following_request_list(
     """
     Lists the following requests of organization this user has direct access to.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     output_iterable(client.iter_organization_following_requests(organization_id))
 
 
@@ -28,7 +28,7 @@ def organization_following_request_get(
     """
     Returns a request received by an organization to follow another.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(client.get_organization_following_request(organization_id, following_id))
 
 
@@ -40,7 +40,7 @@ def organization_following_request_accept(
     """
     Accepts a request to follow another organization.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.accept_organization_following_request(organization_id, following_id)
     )
@@ -54,7 +54,7 @@ def organization_following_request_decline(
     """
     Declines a request to follow another organization.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.decline_organization_following_request(organization_id, following_id)
     )
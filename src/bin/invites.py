@@ -1,9 +1,9 @@
 from uuid import UUID
 
 import typer
-from zanshinsdk import Client
 
 import src.config.sdk as sdk_config
+from src.lib.client import get_client
 from src.lib.utils import dump_json, output_iterable
 
 ###################################################
@@ -18,7 +18,7 @@ def account_invite_list():
     """
     Iterates over the invites of current logged user.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     output_iterable(client.iter_invites())
 
 
@@ -29,7 +29,7 @@ def account_invite_get(
     """
     Gets a specific invitation details, it only works if the invitation was made for the current logged user.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(client.get_invite(invite_id))
 
 
@@ -41,5 +41,5 @@ def account_invite_accept(
     Accepts an invitation with the informed ID, it only works if the user accepting the invitation is the user that
     received the invitation.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(client.get_invite(invite_id))
@@ -2,10 +2,10 @@ from typing import List, Optional
 from uuid import UUID
 
 import typer
-from zanshinsdk import Client
 from zanshinsdk.client import Roles
 
 import src.config.sdk as sdk_config
+from src.lib.client import get_client
 from src.lib.utils import dump_json, output_iterable
 
 ###################################################
@@ -22,7 +22,7 @@ def organization_member_list(
     """
     Lists the members of organization this user has direct access to.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     output_iterable(client.iter_organization_members(organization_id))
 
 
@@ -36,7 +36,7 @@ def organization_member_get(
     """
     Get organization member.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(client.get_organization_member(organization_id, organization_member_id))
 
 
@@ -55,7 +55,7 @@ def organization_member_update(
     """
     Update organization member.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.update_organization_member(organization_id, organization_member_id, role)
     )
@@ -71,7 +71,7 @@ def organization_member_delete(
     """
     Delete organization member.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.delete_organization_member(organization_id, organization_member_id)
     )
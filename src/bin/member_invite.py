@@ -2,10 +2,10 @@ from typing import List, Optional
 from uuid import UUID
 
 import typer
-from zanshinsdk import Client
 from zanshinsdk.client import Roles
 
 import src.config.sdk as sdk_config
+from src.lib.client import get_client
 from src.lib.utils import dump_json, output_iterable
 
 ###################################################
@@ -22,7 +22,7 @@ def organization_member_invite_list(
     """
     Lists the member invites of organization this user has direct access to.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     output_iterable(client.iter_organization_members_invites(organization_id))
 
 
@@ -41,7 +41,7 @@ def organization_member_invite_create(
     """
     Create organization member invite.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.create_organization_members_invite(
             organization_id,
@@ -61,7 +61,7 @@ def organization_member_invite_get(
     """
     Get organization member invite.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.get_organization_member(
             organization_id, organization_member_invite_email
@@ -79,7 +79,7 @@ def organization_member_invite_delete(
     """
     Delete organization member invite.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.delete_organization_member_invite(
             organization_id, organization_member_invite_email
@@ -97,7 +97,7 @@ def organization_member_invite_resend(
     """
     Resend organization member invitation.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.resend_organization_member_invite(
             organization_id, organization_member_invite_email
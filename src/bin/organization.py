@@ -2,9 +2,9 @@ from typing import Optional
 from uuid import UUID
 
 import typer
-from zanshinsdk import Client
 
 import src.config.sdk as sdk_config
+from src.lib.client import get_client
 from src.lib.utils import dump_json, output_iterable
 
 ###################################################
@@ -19,7 +19,7 @@ def organization_list():
     """
     Lists the organizations this user has direct access to as a member.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     output_iterable(client.iter_organizations())
 
 
@@ -30,7 +30,7 @@ def organization_get(
     """
     Gets an organization given its ID.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(client.get_organization(organization_id))
 
 
@@ -46,7 +46,7 @@ def organization_update(
     """
     Gets an organization given its ID.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(client.update_organization(organization_id, name, picture, email))
 
 
@@ -57,7 +57,7 @@ def organization_create(
     """
     Creates an organization.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(client.create_organization(name))
 
 
@@ -68,5 +68,5 @@ def organization_delete(
     """
     Deletes an organization given its ID.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(client.delete_organization(organization_id))
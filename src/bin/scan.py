@@ -1,9 +1,9 @@
 from uuid import UUID
 
 import typer
-from zanshinsdk import Client
 
 import src.config.sdk as sdk_config
+from src.lib.client import get_client
 from src.lib.utils import dump_json, output_iterable
 
 app = typer.Typer()
@@ -21,7 +21,7 @@ def organization_scan_target_scan_start(
     """
     Starts a scan on the specified scan target.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.start_organization_scan_target_scan(
             organization_id, scan_target_id, force
@@ -37,7 +37,7 @@ def organization_scan_target_scan_stop(
     """
     Stop a scan on the specified scan target.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.stop_organization_scan_target_scan(organization_id, scan_target_id)
     )
@@ -51,7 +51,7 @@ def organization_scan_target_scan_list(
     """
     Lists the scan target scans of organization this user has direct access to.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     output_iterable(
         client.iter_organization_scan_target_scans(organization_id, scan_target_id)
     )
@@ -66,7 +66,7 @@ def organization_scan_target_scan_get(
     """
     Get scan of scan target.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.get_organization_scan_target_scan(
             organization_id, scan_target_id, scan_id
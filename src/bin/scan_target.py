@@ -4,7 +4,6 @@ from uuid import UUID
 import boto3
 import typer
 from boto3_type_annotations.organizations import Client as Boto3OrganizationsClient
-from zanshinsdk import Client
 from zanshinsdk.client import DAILY as DAILY_SCHEDULE
 from zanshinsdk.client import (
     ScanTargetAWS,
@@ -29,6 +28,7 @@ from zanshinsdk.common.enums import OAuthTargetKind
 
 import src.config.sdk as sdk_config
 from src.lib.awsorgrun import AWSOrgRunTarget, awsorgrun
+from src.lib.client import get_client
 from src.lib.models import AWSAccount
 from src.lib.utils import dump_json, output_iterable
 
@@ -42,7 +42,7 @@ def organization_scan_target_list(
     """
     Lists the scan targets of organization this user has direct access to.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     output_iterable(client.iter_organization_scan_targets(organization_id))
 
 
@@ -59,7 +59,7 @@ def organization_scan_target_create(
     """
     Create a new scan target in organization.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
 
     credential_map = {
         ScanTargetKind.AWS: ScanTargetAWS,
@@ -115,7 +115,7 @@ def organization_scan_target_get(
     """
     Get scan target of organization.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(client.get_organization_scan_target(organization_id, scan_target_id))
 
 
@@ -129,7 +129,7 @@ def organization_scan_target_update(
     """
     Update scan target of organization.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.update_organization_scan_target(
             organization_id,
@@ -148,7 +148,7 @@ def organization_scan_target_delete(
     """
     Delete scan target of organization.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(client.delete_organization_scan_target(organization_id, scan_target_id))
 
 
@@ -160,7 +160,7 @@ def organization_scan_target_check(
     """
     Check scan target.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(client.check_organization_scan_target(organization_id, scan_target_id))
 
 
@@ -172,7 +172,7 @@ def organization_scan_target_oauth_link(
     """
     Retrieve a link to allow the user to authorize zanshin to read info from their scan target environment.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(client.get_scan_target_oauth_link(organization_id, scan_target_id))
 
 
@@ -196,7 +196,7 @@ def onboard_organization_aws_scan_target(
     Create a new scan target in organization and perform onboard. Requires boto3 and correct Amazon Web Services (AWS) IAM Privileges.
     Checkout the required Amazon Web Services (AWS) IAM privileges here https://github.com/tenchi-security/zanshin-sdk-python/blob/main/zanshinsdk/docs/README.md
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     credential = ScanTargetAWS(credential)
     kind = ScanTargetKind.AWS
 
@@ -252,7 +252,7 @@ def onboard_organization_aws_organization_scan_target(
     Checkout the required Amazon Web Services (AWS) IAM privileges at
     https://github.com/tenchi-security/zanshin-cli/blob/main/src/lib/docs/README.md
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     if boto3_profile:
         boto3_session = boto3.Session(profile_name=boto3_profile)
     else:
@@ -372,7 +372,7 @@ def _sdk_onboard_scan_target(
     organization_id,
     schedule,
 ):
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     account_credential = ScanTargetAWS(aws_account_id)
     client.onboard_scan_target(
         boto3_session=boto3_session,
@@ -1,11 +1,11 @@
 from uuid import UUID
 
 import typer
-from zanshinsdk import Client
 from zanshinsdk.client import ScanTargetGroupCredentialListORACLE, ScanTargetKind
 from zanshinsdk.common.enums import OAuthTargetKind
 
 import src.config.sdk as sdk_config
+from src.lib.client import get_client
 from src.lib.utils import dump_json, output_iterable
 
 app = typer.Typer()
@@ -18,7 +18,7 @@ def scan_target_groups_list(
     """
     Lists the scan target groups of the user's organization.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     output_iterable(client.iter_organization_scan_target_groups(organization_id))
 
 
@@ -32,7 +32,7 @@ def scan_target_groups_get(
     """
     Gets details of the scan target group given its ID.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.get_organization_scan_target_group(organization_id, scan_target_group_id)
     )
@@ -48,7 +48,7 @@ def scan_target_groups_delete(
     """
     Deletes the scan target group of the organization.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.delete_organization_scan_target_group(
             organization_id, scan_target_group_id
@@ -67,7 +67,7 @@ def scan_target_groups_update(
     """
     Updates a scan target group.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.update_scan_target_group(organization_id, scan_target_group_id, name)
     )
@@ -85,7 +85,7 @@ def scan_target_groups_create(
     """
     Creates a scan target group for the organization.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     scan_target_group = client.create_scan_target_group(organization_id, kind, name)
 
     if kind not in [member.value for member in OAuthTargetKind]:
@@ -117,7 +117,7 @@ def organization_scan_target_group_oauth_link(
     """
     Retrieve a link to allow the user to authorize zanshin to read info from their scan target group environment.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.get_scan_target_group_oauth_link(organization_id, scan_target_group_id)
     )
@@ -133,7 +133,7 @@ def scan_target_groups_script(
     """
     Gets download URL of the scan target group.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.get_scan_target_group_script(organization_id, scan_target_group_id)
     )
@@ -149,7 +149,7 @@ def scan_target_groups_compartments(
     """
     Iterates over the compartments of a scan target group.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     output_iterable(
         client.iter_scan_target_group_compartments(
             organization_id, scan_target_group_id
@@ -181,7 +181,7 @@ def scan_target_groups_insert(
     credential = ScanTargetGroupCredentialListORACLE(
         region, tenancy_id, user_id, key_fingerprint
     )
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.insert_scan_target_group_credential(
             organization_id, scan_target_group_id, credential
@@ -203,7 +203,7 @@ def scan_target_groups_create_by_compartments(
     """
     Creates Scan Targets from previous listed compartments inside the scan target group.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.create_scan_target_by_compartments(
             organization_id, scan_target_group_id, name, ocid
@@ -221,7 +221,7 @@ def scan_target_groups_scan_targets(
     """
     Gets all scan targets from a specific scan target group.
     """
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     output_iterable(
         client.iter_scan_targets_from_group(organization_id, scan_target_group_id)
     )
@@ -2,9 +2,10 @@ from typing import List, Optional
 from uuid import UUID
 
 import typer
-from zanshinsdk import AlertSeverity, Client, Languages, ScanTargetKind
+from zanshinsdk import AlertSeverity, Languages, ScanTargetKind
 
 import src.config.sdk as sdk_config
+from src.lib.client import get_client
 from src.lib.utils import dump_json
 
 app = typer.Typer()
@@ -29,7 +30,7 @@ def summary_scan_targets_following(
         None, help="Include alerts from scan targets without tags"
     ),
 ):
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.get_scan_targets_following_summary(
             organization_id=organization_id,
@@ -58,7 +59,7 @@ def summary_scan_targets_detail(
         None, help="Only summarize alerts with the specified severities"
     ),
 ):
-    client = Client(profile=sdk_config.profile)
+    client = get_client(sdk_config.profile)
     dump_json(
         client.get_scan_target_detail_summary(
             organization_id=organization_id,
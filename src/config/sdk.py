@@ -1,7 +1,19 @@
-from src.lib.models import OutputFormat
+from typing import List, Optional
+
+from src.lib.models import JSONBackend, OutputFormat
+from src.lib.timings import Timings
 
 entries: int = 1
 profile: str
 format: OutputFormat
 debug: bool
 verbose: bool
+csv_columns: Optional[List[str]] = None
+json_backend: JSONBackend = JSONBackend.AUTO
+# None buffers output unless it's written to a terminal
+buffer_size: Optional[int] = None
+prefetch_batches: int = 0
+limit: Optional[int] = None
+page_size: Optional[int] = None
+auto_page_size: bool = False
+timings: Optional[Timings] = None
@@ -0,0 +1,293 @@
+import sqlite3
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+from uuid import UUID
+
+from zanshinsdk.client import CONFIG_DIR
+
+from src.lib.json_backend import json_dumps, json_loads
+from src.lib.partition import api_timestamp
+
+# number of alerts upserted per transaction
+BATCH_SIZE: int = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS alerts (
+    id TEXT PRIMARY KEY,
+    scan_target_id TEXT,
+    rule TEXT,
+    resource TEXT,
+    title TEXT,
+    state TEXT,
+    severity TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    opened_at TEXT,
+    resolved_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scan_target_tags (
+    scan_target_id TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (scan_target_id, tag)
+);
+CREATE INDEX IF NOT EXISTS alerts_scan_target_id ON alerts (scan_target_id);
+CREATE INDEX IF NOT EXISTS alerts_state_severity ON alerts (state, severity);
+CREATE INDEX IF NOT EXISTS alerts_severity ON alerts (severity);
+CREATE INDEX IF NOT EXISTS alerts_rule ON alerts (rule);
+CREATE INDEX IF NOT EXISTS alerts_created_at ON alerts (created_at);
+CREATE INDEX IF NOT EXISTS alerts_updated_at ON alerts (updated_at);
+CREATE INDEX IF NOT EXISTS alerts_opened_at ON alerts (opened_at);
+CREATE INDEX IF NOT EXISTS alerts_resolved_at ON alerts (resolved_at);
+CREATE INDEX IF NOT EXISTS scan_target_tags_tag ON scan_target_tags (tag);
+"""
+
+# columns alerts can be sorted on, by AlertsOrderOpts value
+_ORDER_COLUMNS = {
+    "scanTargetId": "scan_target_id",
+    "resource": "resource",
+    "rule": "rule",
+    "severity": (
+        "CASE severity WHEN 'CRITICAL' THEN 0 WHEN 'HIGH' THEN 1 WHEN 'MEDIUM' THEN 2 WHEN 'LOW' THEN 3 ELSE 4 END"
+    ),
+    "state": "state",
+    "openedAt": "opened_at",
+    "resolvedAt": "resolved_at",
+    "createdAt": "created_at",
+    "updatedAt": "updated_at",
+}
+
+# date filters, by column and whether they are the start of the range
+_DATE_FILTERS = {
+    "created_at_start": ("created_at", ">="),
+    "created_at_end": ("created_at", "<="),
+    "updated_at_start": ("updated_at", ">="),
+    "updated_at_end": ("updated_at", "<="),
+    "opened_at_start": ("opened_at", ">="),
+    "opened_at_end": ("opened_at", "<="),
+    "resolved_at_start": ("resolved_at", ">="),
+    "resolved_at_end": ("resolved_at", "<="),
+}
+
+_UPSERT = """
+INSERT OR REPLACE INTO alerts (
+    id, scan_target_id, rule, resource, title, state, severity, created_at, updated_at, opened_at, resolved_at, data
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def default_mirror_path(organization_id: Union[UUID, str]) -> Path:
+    """
+    :param organization_id: the ID of the organization
+    :return: where the mirror of an organization's alerts is kept unless another file is given
+    """
+    return CONFIG_DIR / "mirror" / f"{organization_id}.sqlite3"
+
+
+def _row(alert: Dict) -> tuple:
+    return (
+        alert["id"],
+        alert.get("scanTargetId"),
+        alert.get("rule"),
+        alert.get("resource"),
+        alert.get("title"),
+        alert.get("state"),
+        alert.get("severity"),
+        alert.get("createdAt"),
+        alert.get("updatedAt"),
+        alert.get("openedAt"),
+        alert.get("resolvedAt"),
+        json_dumps(alert),
+    )
+
+
+def _value(value) -> Optional[str]:
+    # enum members (AlertState, SortOpts, ...) are stored by value
+    return None if value is None else str(getattr(value, "value", value))
+
+
+class AlertMirror:
+    """
+    Local SQLite copy of an organization's alerts. Alerts are stored as returned by the API, along with the fields
+    used for filtering and sorting, and the most recent updatedAt stored (the watermark) tells which alerts must be
+    retrieved on the next sync
+    """
+
+    def __init__(self, path: Path, organization_id: Union[UUID, str]):
+        """
+        :param path: the SQLite database file, created if needed
+        :param organization_id: the ID of the organization mirrored in the file
+        """
+        self._path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path))
+        # each batch is its own transaction, and losing the last ones on a crash only means fetching them again
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.executescript(_SCHEMA)
+        stored = self._get_meta("organization_id")
+        if stored is None:
+            with self._db:
+                self._set_meta("organization_id", str(organization_id))
+        elif stored != str(organization_id):
+            self._db.close()
+            raise ValueError(
+                f"{path} is a mirror of organization {stored}, not {organization_id}"
+            )
+
+    def __enter__(self) -> "AlertMirror":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # keeps the statistics used by the query planner to pick indexes up to date
+        self._db.execute("PRAGMA optimize")
+        self._db.close()
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._db.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: Optional[str]) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    @property
+    def watermark(self) -> Optional[str]:
+        """The most recent updatedAt stored, or None if nothing was synced yet."""
+        return self._get_meta("watermark")
+
+    def count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM alerts").fetchone()[0]
+
+    def reset(self) -> None:
+        """
+        Drops all stored alerts, so the next sync retrieves everything again
+        """
+        with self._db:
+            self._db.execute("DELETE FROM alerts")
+            self._set_meta("watermark", None)
+
+    def upsert(self, alerts: Iterator[Dict]) -> int:
+        """
+        Inserts or replaces alerts in batched transactions. Alerts must come in increasing updatedAt order, as the
+        watermark is moved with each batch: an interrupted sync then resumes from the last batch stored
+        :param alerts: the alerts to store
+        :return: the number of alerts stored
+        """
+        stored = 0
+        watermark = self.watermark
+        while True:
+            batch = list(islice(alerts, BATCH_SIZE))
+            if not batch:
+                return stored
+            for alert in batch:
+                updated_at = alert.get("updatedAt")
+                if updated_at and (watermark is None or updated_at > watermark):
+                    watermark = updated_at
+            with self._db:
+                self._db.executemany(_UPSERT, [_row(alert) for alert in batch])
+                self._set_meta("watermark", watermark)
+            stored += len(batch)
+
+    def replace_scan_targets(self, scan_targets: Iterable[Dict]) -> None:
+        """
+        Stores the tags of the organization's scan targets, used to filter alerts by scan target tags
+        :param scan_targets: the scan targets as returned by the API
+        """
+        with self._db:
+            self._db.execute("DELETE FROM scan_target_tags")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO scan_target_tags (scan_target_id, tag) VALUES (?, ?)",
+                [
+                    (scan_target["id"], tag)
+                    for scan_target in scan_targets
+                    for tag in scan_target.get("tags") or []
+                ],
+            )
+
+    def query(
+        self,
+        scan_target_ids: Optional[List[Union[UUID, str]]] = None,
+        scan_target_tags: Optional[List[str]] = None,
+        include_empty_scan_target_tags: Optional[bool] = None,
+        rules: Optional[List[str]] = None,
+        states: Optional[List[str]] = None,
+        severities: Optional[List[str]] = None,
+        search: Optional[str] = None,
+        order: Optional[str] = None,
+        sort: Optional[str] = None,
+        **dates: Optional[str],
+    ) -> Iterator[Dict]:
+        """
+        Lists stored alerts using the same filters as the API alert list, answered from indexed columns
+        :param scan_target_ids: only alerts from these scan targets
+        :param scan_target_tags: only alerts from scan targets with these tags
+        :param include_empty_scan_target_tags: also include alerts from scan targets without tags
+        :param rules: only alerts of these rules
+        :param states: only alerts in these states
+        :param severities: only alerts with these severities
+        :param search: only alerts with this text in their title, resource, rule or ID
+        :param order: AlertsOrderOpts value of the field to sort on
+        :param sort: ASC or DESC
+        :param dates: created_at_start, created_at_end, updated_at_start, updated_at_end, opened_at_start,
+        opened_at_end, resolved_at_start and resolved_at_end, in the format YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS
+        :return: an iterator over the alerts, as returned by the API
+        """
+        where: List[str] = []
+        params: List = []
+
+        def any_of(column: str, values: Iterable) -> None:
+            values = [_value(v) for v in values]
+            where.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+
+        if scan_target_ids:
+            any_of("scan_target_id", scan_target_ids)
+        if scan_target_tags:
+            tags = [_value(tag) for tag in scan_target_tags]
+            condition = (
+                "scan_target_id IN (SELECT scan_target_id FROM scan_target_tags WHERE tag IN "
+                f"({', '.join('?' * len(tags))}))"
+            )
+            if include_empty_scan_target_tags:
+                condition = f"({condition} OR scan_target_id NOT IN (SELECT scan_target_id FROM scan_target_tags))"
+            where.append(condition)
+            params.extend(tags)
+        if rules:
+            any_of("rule", rules)
+        if states:
+            any_of("state", states)
+        if severities:
+            any_of("severity", severities)
+        if search:
+            where.append(
+                "(title LIKE ? OR resource LIKE ? OR rule LIKE ? OR id LIKE ?)"
+            )
+            params.extend([f"%{search}%"] * 4)
+        for name, value in dates.items():
+            if name not in _DATE_FILTERS:
+                raise TypeError(f"unexpected filter {name}")
+            if value:
+                column, operator = _DATE_FILTERS[name]
+                where.append(f"{column} {operator} ?")
+                params.append(api_timestamp(value))
+
+        sql = "SELECT data FROM alerts"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        direction = "DESC" if _value(sort) == "DESC" else "ASC"
+        column = _ORDER_COLUMNS.get(_value(order), _ORDER_COLUMNS["severity"])
+        sql += f" ORDER BY {column} {direction}, id"
+        for (data,) in self._db.execute(sql, params):
+            yield json_loads(data)
@@ -0,0 +1,183 @@
+import sqlite3
+from contextlib import closing
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.lib.json_backend import json_dumps, json_loads
+
+# number of alerts applied per transaction, so concurrent writers don't hold the database lock for long
+BATCH_SIZE: int = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS followings (
+    scope TEXT NOT NULL,
+    following_id TEXT NOT NULL,
+    high_water_mark TEXT,
+    PRIMARY KEY (scope, following_id)
+);
+CREATE TABLE IF NOT EXISTS alerts (
+    scope TEXT NOT NULL,
+    following_id TEXT NOT NULL,
+    alert_id TEXT NOT NULL,
+    opened INTEGER NOT NULL,
+    tags TEXT NOT NULL,
+    PRIMARY KEY (scope, following_id, alert_id)
+);
+CREATE TABLE IF NOT EXISTS counters (
+    scope TEXT NOT NULL,
+    following_id TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    open INTEGER NOT NULL,
+    resolved INTEGER NOT NULL,
+    PRIMARY KEY (scope, following_id, tag)
+);
+"""
+
+OPEN_STATES = ("OPEN", "IN_PROGRESS")
+
+
+def alert_categories(alert: Dict) -> Tuple[bool, List[str]]:
+    """
+    Extracts what an alert contributes to the category report
+    :param alert: the alert as returned by the API
+    :return: whether the alert is open, and its upper case tags (UNCATEGORIZED if it has none)
+    """
+    tags = alert.get("tags") or ["UNCATEGORIZED"]
+    return alert["state"] in OPEN_STATES, [tag.upper() for tag in tags]
+
+
+class CategorySnapshot:
+    """
+    Local SQLite store of the per tag open/resolved counters of each following used by the alert category report,
+    along with the contribution of every alert and the most recent updatedAt seen (the high-water mark). Later runs
+    only need to retrieve alerts updated since the high-water mark and apply them as deltas. Alerts that stop
+    matching the report filters without being updated, or are deleted, are only dropped when the snapshot is rebuilt
+    """
+
+    def __init__(self, path: Path, scope: str):
+        """
+        :param path: the SQLite database file, created if needed
+        :param scope: identifies the report parameters (organization and severities), so that runs with different
+        parameters don't share counters
+        """
+        self._path = path
+        self._scope = scope
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as db:
+            db.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # a connection per operation, as each following is processed on its own thread
+        return sqlite3.connect(str(self._path), timeout=60)
+
+    def reset(self) -> None:
+        """
+        Drops everything stored for this scope, so the next run retrieves all alerts again
+        """
+        with closing(self._connect()) as db, db:
+            for table in ("followings", "alerts", "counters"):
+                db.execute(f"DELETE FROM {table} WHERE scope = ?", (self._scope,))
+
+    def high_water_mark(self, following_id: str) -> Optional[str]:
+        """
+        :param following_id: the ID of the following
+        :return: the most recent updatedAt applied for the following, or None if it was never processed
+        """
+        with closing(self._connect()) as db:
+            row = db.execute(
+                "SELECT high_water_mark FROM followings WHERE scope = ? AND following_id = ?",
+                (self._scope, following_id),
+            ).fetchone()
+        return row[0] if row else None
+
+    def apply(self, following_id: str, alerts: Iterator[Dict]) -> None:
+        """
+        Applies new or updated alerts of a following to its counters, replacing the previous contribution of alerts
+        that were already known. The high-water mark is only moved once all alerts were applied, so an interrupted
+        run starts again from the previous one
+        :param following_id: the ID of the following
+        :param alerts: the alerts updated since the high-water mark
+        """
+        mark = self.high_water_mark(following_id)
+        with closing(self._connect()) as db:
+            while True:
+                batch = list(islice(alerts, BATCH_SIZE))
+                if not batch:
+                    break
+                with db:
+                    for alert in batch:
+                        self._apply_alert(db, following_id, alert)
+                        updated_at = alert.get("updatedAt")
+                        if updated_at and (mark is None or updated_at > mark):
+                            mark = updated_at
+                    # tags no longer used by any alert
+                    db.execute(
+                        "DELETE FROM counters WHERE scope = ? AND following_id = ? AND open = 0 AND resolved = 0",
+                        (self._scope, following_id),
+                    )
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO followings (scope, following_id, high_water_mark) VALUES (?, ?, ?)",
+                    (self._scope, following_id, mark),
+                )
+
+    def _apply_alert(
+        self, db: sqlite3.Connection, following_id: str, alert: Dict
+    ) -> None:
+        key = (self._scope, following_id, alert["id"])
+        previous = db.execute(
+            "SELECT opened, tags FROM alerts WHERE scope = ? AND following_id = ? AND alert_id = ?",
+            key,
+        ).fetchone()
+        if previous:
+            self._count(
+                db, following_id, bool(previous[0]), json_loads(previous[1]), -1
+            )
+        opened, tags = alert_categories(alert)
+        self._count(db, following_id, opened, tags, 1)
+        db.execute(
+            "INSERT OR REPLACE INTO alerts (scope, following_id, alert_id, opened, tags) VALUES (?, ?, ?, ?, ?)",
+            (*key, int(opened), json_dumps(tags)),
+        )
+
+    def _count(
+        self,
+        db: sqlite3.Connection,
+        following_id: str,
+        opened: bool,
+        tags: List[str],
+        delta: int,
+    ) -> None:
+        for tag in tags:
+            db.execute(
+                "INSERT OR IGNORE INTO counters (scope, following_id, tag, open, resolved) VALUES (?, ?, ?, 0, 0)",
+                (self._scope, following_id, tag),
+            )
+            column = "open" if opened else "resolved"
+            db.execute(
+                f"UPDATE counters SET {column} = {column} + ? WHERE scope = ? AND following_id = ? AND tag = ?",
+                (delta, self._scope, following_id, tag),
+            )
+
+    def categories(self, following_id: str) -> Tuple[Dict[str, Dict], List[str]]:
+        """
+        :param following_id: the ID of the following
+        :return: the open and resolved counters of each tag, in the order tags were first seen, and the tags the
+        following contributes to the global average (the last tag of each alert)
+        """
+        with closing(self._connect()) as db:
+            counters = {
+                tag: {"open": opened, "resolved": resolved}
+                for tag, opened, resolved in db.execute(
+                    "SELECT tag, open, resolved FROM counters WHERE scope = ? AND following_id = ? ORDER BY rowid",
+                    (self._scope, following_id),
+                )
+            }
+            last_tags = {}
+            for (tags,) in db.execute(
+                "SELECT tags FROM alerts WHERE scope = ? AND following_id = ? ORDER BY rowid",
+                (self._scope, following_id),
+            ):
+                last_tags.setdefault(json_loads(tags)[-1], None)
+        return counters, list(last_tags)
@@ -0,0 +1,25 @@
+from threading import Lock
+from typing import Dict
+
+from zanshinsdk import Client
+
+import src.config.sdk as sdk_config
+
+_clients: Dict[str, Client] = {}
+_lock = Lock()
+
+
+def get_client(profile: str) -> Client:
+    """
+    Returns the client of a configuration profile, created on first use and shared by every later call in the
+    process, so that the configuration file is read once and connections to the API are kept alive between requests
+    :param profile: the configuration profile to use
+    :return: the client of the profile
+    """
+    with _lock:
+        client = _clients.get(profile)
+        if client is None:
+            client = _clients[profile] = Client(profile=profile)
+            if sdk_config.timings:
+                sdk_config.timings.instrument(client)
+        return client
@@ -0,0 +1,73 @@
+import json
+import re
+from typing import Any, Callable, Optional
+
+import src.config.sdk as sdk_config
+from src.lib.models import JSONBackend
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# orjson parses integers outside the 64-bit range as floats, documents with integers of 19 or more digits are parsed
+# with the standard library instead
+_WIDE_INTEGER = re.compile(r"\d{19}")
+
+
+def orjson_available() -> bool:
+    """
+    Checks whether the optional orjson package is installed
+    :return: True if orjson can be used as JSON backend
+    """
+    return orjson is not None
+
+
+def _backend() -> JSONBackend:
+    backend = sdk_config.json_backend
+    if backend is not JSONBackend.STDLIB and not orjson_available():
+        return JSONBackend.STDLIB
+    return backend
+
+
+def json_dumps(
+    obj: Any, indent: Optional[int] = None, default: Optional[Callable] = None
+) -> str:
+    """
+    Serializes an object to a JSON string using the configured backend. Compact output (no indent) has no whitespace
+    and leaves non-ASCII characters unescaped with either backend, as orjson does; the backends still differ in how
+    some floats are written (1e16 and 1e+16) and in NaN, which orjson writes as null. Indented output uses the
+    standard library, escaping non-ASCII characters as before, unless orjson was explicitly requested, as orjson only
+    supports two-space indentation
+    :param obj: the object to serialize
+    :param indent: number of spaces to indent with, or None for compact output
+    :param default: callable used to serialize objects that are not natively supported
+    :return: the JSON document as a string
+    """
+    backend = _backend()
+    if backend is JSONBackend.ORJSON or (
+        backend is JSONBackend.AUTO and indent is None
+    ):
+        option = orjson.OPT_INDENT_2 if indent else None
+        try:
+            return orjson.dumps(obj, default=default, option=option).decode("utf-8")
+        except (orjson.JSONEncodeError, TypeError):
+            # e.g. integers over 64 bits or non-string keys, let the standard library deal with them
+            pass
+    if indent is None:
+        return json.dumps(
+            obj, separators=(",", ":"), ensure_ascii=False, default=default
+        )
+    return json.dumps(obj, indent=indent, default=default)
+
+
+def json_loads(data: str) -> Any:
+    """
+    Parses a JSON document using the configured backend, falling back to the standard library for documents that may
+    hold integers too wide for orjson, so that they are not turned into floats
+    :param data: the JSON document
+    :return: the parsed object
+    """
+    if _backend() is not JSONBackend.STDLIB and not _WIDE_INTEGER.search(data):
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,84 @@
+from importlib import import_module
+from typing import Dict, List, NamedTuple, Optional, Tuple, Type
+
+import click
+import typer
+from typer.core import TyperGroup
+
+# key of the context meta, shared by all the contexts of an invocation, where the names of the subcommands invoked are
+# recorded
+COMMAND_PATH: str = "zanshin.command_path"
+
+
+class LazyTyper(NamedTuple):
+    """
+    A sub-app registered without importing it: module is the module defining it as app, help is shown in the help of
+    the parent group, and subgroups are the sub-apps registered under it
+    """
+
+    module: str
+    help: str
+    subgroups: Dict[str, "LazyTyper"] = {}
+
+
+class LazyTyperGroup(TyperGroup):
+    """
+    Click group of a Typer app whose sub-apps are only imported, along with their dependencies, when invoked
+    """
+
+    subgroups: Dict[str, LazyTyper] = {}
+    _listing: bool = False
+
+    def format_help(self, ctx: click.Context, formatter: click.HelpFormatter) -> None:
+        # the help only needs the name and help of each sub-app, which don't require importing it
+        self._listing = True
+        try:
+            super().format_help(ctx, formatter)
+        finally:
+            self._listing = False
+
+    def shell_complete(
+        self, ctx: click.Context, incomplete: str
+    ) -> List["click.shell_completion.CompletionItem"]:
+        # completing the name of a subcommand only needs the name and help of each sub-app too
+        self._listing = True
+        try:
+            return super().shell_complete(ctx, incomplete)
+        finally:
+            self._listing = False
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return super().list_commands(ctx) + [
+            name for name in self.subgroups if name not in self.commands
+        ]
+
+    def get_command(self, ctx: click.Context, name: str) -> Optional[click.Command]:
+        if name not in self.commands and name in self.subgroups:
+            if self._listing:
+                return TyperGroup(name=name, help=self.subgroups[name].help)
+            self.commands[name] = _load(name, self.subgroups[name])
+        return super().get_command(ctx, name)
+
+    def resolve_command(
+        self, ctx: click.Context, args: List[str]
+    ) -> Tuple[Optional[str], Optional[click.Command], List[str]]:
+        name, command, args = super().resolve_command(ctx, args)
+        ctx.meta.setdefault(COMMAND_PATH, []).append(name)
+        return name, command, args
+
+
+def lazy_group_class(subgroups: Dict[str, LazyTyper]) -> Type[LazyTyperGroup]:
+    """
+    :param subgroups: the sub-apps of the group, by name
+    :return: a group class to pass as cls to typer.Typer
+    """
+    return type("LazyTyperGroup", (LazyTyperGroup,), {"subgroups": subgroups})
+
+
+def _load(name: str, lazy: LazyTyper) -> click.Command:
+    app: typer.Typer = import_module(lazy.module).app
+    app.info.cls = lazy_group_class(lazy.subgroups)
+    group = typer.main.get_group(app)
+    group.name = name
+    group.help = lazy.help
+    return group
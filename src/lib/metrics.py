@@ -0,0 +1,193 @@
+import os
+import sys
+from pathlib import Path
+from time import perf_counter, time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import click
+
+from src.lib.persistence import replacing_file
+from src.lib.timings import Timings
+
+# upper bounds in seconds of the buckets of the API request latency histogram
+LATENCY_BUCKETS: Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LAST_SUCCESS = "zanshin_run_last_success_timestamp_seconds"
+
+
+def exit_code() -> int:
+    """
+    Tells how the command is ending, meant for the callbacks run when its context closes, which happens while the
+    exception ending the command, if any, is being raised
+    :return: the exit status of the command
+    """
+    error = sys.exc_info()[1]
+    if error is None:
+        return 0
+    if isinstance(error, (click.exceptions.Exit, click.ClickException)):
+        return error.exit_code
+    if isinstance(error, SystemExit):
+        if error.code is None or isinstance(error.code, int):
+            return error.code or 0
+    return 1
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    return (
+        "{"
+        + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+        + "}"
+    )
+
+
+def _gauge(
+    name: str, help: str, samples: Sequence[Tuple[Dict[str, str], float]]
+) -> List[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+    lines += [f"{name}{_labels(labels)} {value!r}" for labels, value in samples]
+    return lines
+
+
+def _histogram(
+    name: str, help: str, labels: Dict[str, str], values: Sequence[float]
+) -> List[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+    for bound in LATENCY_BUCKETS:
+        count = sum(1 for value in values if value <= bound)
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': repr(bound)})} {count}")
+    lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {len(values)}")
+    lines.append(f"{name}_sum{_labels(labels)} {sum(values)!r}")
+    lines.append(f"{name}_count{_labels(labels)} {len(values)}")
+    return lines
+
+
+def format_metrics(
+    timings: Timings,
+    entries: int,
+    command: str,
+    status: int = 0,
+    last_success: Optional[float] = None,
+) -> str:
+    """
+    :param timings: the statistics collected during the run
+    :param entries: number of entries output
+    :param command: the command run, added as a label to every sample
+    :param status: the exit status of the run
+    :param last_success: Unix time at which the command last succeeded before this run, if known
+    :return: the statistics of the run in the Prometheus text exposition format. Values describe the last run, so
+    totals are exposed as gauges rather than counters
+    """
+    labels = {"command": command}
+    end = time()
+    if status == 0:
+        last_success = end
+    elapsed = perf_counter() - timings.start
+    latencies = list(timings.latencies)
+    lines = (
+        _gauge(
+            "zanshin_run_duration_seconds",
+            "Wall time of the run",
+            [(labels, elapsed)],
+        )
+        + _gauge(
+            "zanshin_run_end_timestamp_seconds",
+            "Unix time at which the run ended",
+            [(labels, end)],
+        )
+        + _gauge(
+            "zanshin_run_success",
+            "Whether the run succeeded, 1 if it exited with status 0 and 0 otherwise",
+            [(labels, int(status == 0))],
+        )
+        + _gauge(
+            "zanshin_run_exit_code",
+            "Exit status of the run",
+            [(labels, status)],
+        )
+        + _gauge(
+            LAST_SUCCESS,
+            "Unix time at which a run of the command last succeeded",
+            [(labels, last_success)] if last_success is not None else [],
+        )
+        + _gauge(
+            "zanshin_run_phase_seconds",
+            "Time spent waiting for entries, writing output and on the rest of the output, mostly formatting "
+            "entries and saving progress",
+            [
+                ({**labels, "phase": "waiting"}, timings.waiting),
+                ({**labels, "phase": "writing"}, timings.writing),
+                ({**labels, "phase": "other"}, timings.other),
+            ],
+        )
+        + _gauge(
+            "zanshin_run_entries",
+            "Entries processed in the run",
+            [(labels, entries)],
+        )
+        + _gauge(
+            "zanshin_run_api_requests",
+            "API requests made in the run",
+            [(labels, len(latencies))],
+        )
+        + _gauge(
+            "zanshin_run_api_retries",
+            "API requests retried after rate limiting, timeouts or server errors in the run",
+            [(labels, timings.retries)],
+        )
+        + _gauge(
+            "zanshin_run_output_bytes",
+            "Bytes of output written in the run",
+            [(labels, timings.written)],
+        )
+        + _histogram(
+            "zanshin_api_request_duration_seconds",
+            "Latency of the API requests made in the run",
+            labels,
+            latencies,
+        )
+    )
+    return "\n".join(lines) + "\n"
+
+
+def _last_success(path: Path, command: str) -> Optional[float]:
+    """
+    :return: the time of the last successful run of a command according to the metrics file written before, if any
+    """
+    prefix = f"{LAST_SUCCESS}{_labels({'command': command})} "
+    try:
+        lines = path.read_text().splitlines()
+    except (OSError, UnicodeDecodeError):
+        return None
+    for line in lines:
+        if line.startswith(prefix):
+            try:
+                return float(line[len(prefix) :])
+            except ValueError:
+                return None
+    return None
+
+
+def write_metrics(
+    path: Path, timings: Timings, entries: int, command: str, status: int = 0
+) -> None:
+    """
+    Writes the statistics of the run to a file, replacing it atomically so that a collector such as the textfile
+    collector of the Prometheus node exporter never reads a partial file. When the run failed, the time of the last
+    successful run is kept from the file being replaced, so alerts can fire on how long ago the command last worked
+    :param path: the file to write
+    :param timings: the statistics collected during the run
+    :param entries: number of entries output
+    :param command: the command run
+    :param status: the exit status of the run
+    """
+    last_success = _last_success(path, command) if status else None
+    with replacing_file(str(path)) as temporary:
+        Path(temporary).write_text(
+            format_metrics(timings, entries, command, status, last_success)
+        )
+        # temporary files are only readable by their owner, collectors often run as another user
+        os.chmod(temporary, 0o644)
@@ -16,9 +16,21 @@ class OutputFormat(str, Enum):
     """
 
     JSON = "json"
+    JSONL = "jsonl"
     TABLE = "table"
     CSV = "csv"
     HTML = "html"
+    COUNT = "count"
+
+
+class JSONBackend(str, Enum):
+    """
+    Used to specify command-line parameters indicating which JSON encoder to use.
+    """
+
+    AUTO = "auto"
+    STDLIB = "stdlib"
+    ORJSON = "orjson"
 
 
 class AWSAccount(dict):
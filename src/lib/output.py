@@ -0,0 +1,106 @@
+import os
+import sys
+from time import perf_counter
+from typing import List, Optional, TextIO
+
+import typer
+
+from src.lib.timings import Timings
+
+DEFAULT_BUFFER_SIZE: int = 64 * 1024
+
+
+class OutputSink:
+    """
+    Buffered writer for command output. Text is accumulated in memory and written to stdout in chunks of at least
+    buffer_size characters, instead of issuing a write and flush per entry, which dominates runtime when stdout is a
+    pipe. A buffer_size of 0 writes every chunk immediately, which is the default for terminals so that entries show
+    up as they arrive. If the reading end of the pipe goes away (EPIPE), further output is discarded and the command
+    exits quietly
+    """
+
+    def __init__(
+        self,
+        buffer_size: Optional[int] = None,
+        file: Optional[TextIO] = None,
+        timings: Optional[Timings] = None,
+    ):
+        """
+        :param buffer_size: minimum number of characters written at a time, by default 0 for terminals and
+        DEFAULT_BUFFER_SIZE otherwise
+        :param file: where output is written, stdout by default
+        :param timings: where the time spent writing and the bytes written are added, if given
+        """
+        if buffer_size is None:
+            buffer_size = 0 if _isatty(file or sys.stdout) else DEFAULT_BUFFER_SIZE
+        self._buffer_size = max(0, buffer_size)
+        self._file = file
+        self._timings = timings
+        self._chunks: List[str] = []
+        self._pending = 0
+
+    def __enter__(self) -> "OutputSink":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None or not issubclass(exc_type, BrokenPipeError):
+            self.flush()
+
+    def write(self, data: str) -> None:
+        """
+        Adds text to the buffer, flushing it if it grew past the buffer size
+        :param data: the text to write
+        :return: None
+        """
+        self._chunks.append(data)
+        self._pending += len(data)
+        if self._pending >= self._buffer_size:
+            self.flush()
+
+    def writeline(self, line: str) -> None:
+        self.write(line + "\n")
+
+    def flush(self) -> None:
+        """
+        Writes all buffered text to the output
+        :return: None
+        """
+        if not self._chunks:
+            return
+        data = "".join(self._chunks)
+        self._chunks.clear()
+        self._pending = 0
+        start = perf_counter()
+        written = 0
+        try:
+            typer.echo(data, file=self._file, nl=False)
+            if self._timings:
+                written = len(data.encode())
+        except BrokenPipeError:
+            if self._file is None or self._file is sys.stdout:
+                # other files, such as those of --shard-dir, leave the rest of the output to stdout alone
+                _silence_stdout()
+            raise typer.Exit(code=1)
+        finally:
+            if self._timings:
+                self._timings.record_write(perf_counter() - start, written)
+
+
+def _isatty(file: TextIO) -> bool:
+    try:
+        return file.isatty()
+    except (AttributeError, ValueError):
+        # no isatty, or closed
+        return False
+
+
+def _silence_stdout() -> None:
+    """
+    Points stdout to devnull, so that the interpreter doesn't fail again flushing it at exit after the reader of a
+    pipe went away
+    """
+    try:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+    except (AttributeError, OSError, ValueError):
+        pass
@@ -0,0 +1,132 @@
+from itertools import chain
+from time import perf_counter
+from typing import Callable, Dict, Iterator, Optional
+
+import httpx
+
+import src.config.sdk as sdk_config
+from src.lib.pipeline import iter_pages
+
+# largest page size requested, the one the SDK uses by default to list alerts
+MAX_PAGE_SIZE: int = 1000
+# smallest page size the automatic page size shrinks to
+MIN_PAGE_SIZE: int = 10
+# response time, in seconds, the automatic page size aims to stay under
+DEFAULT_TARGET_LATENCY: float = 2.0
+# times a page is requested again with a smaller size after a timeout or server error
+DEFAULT_MAX_SHRINKS: int = 3
+
+
+def list_page_size(default: int) -> int:
+    """
+    :param default: the page size a list operation uses by default
+    :return: the page size to request: the one given with --page-size, if any, or the default. With --page-size
+    auto, this is where the automatic page size starts from
+    """
+    return sdk_config.page_size or default
+
+
+def _retryable(e: Exception) -> bool:
+    if isinstance(e, httpx.TimeoutException):
+        return True
+    return isinstance(e, httpx.HTTPStatusError) and e.response.status_code >= 500
+
+
+class AdaptivePageSize:
+    """
+    Tunes the page size of a cursor paginated operation from the response time of each page: it doubles while pages
+    take less than half the target latency, halves when they take longer than the target, and halves and requests the
+    same page again on timeouts and server errors
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = MIN_PAGE_SIZE,
+        maximum: int = MAX_PAGE_SIZE,
+        target_latency: float = DEFAULT_TARGET_LATENCY,
+        max_shrinks: int = DEFAULT_MAX_SHRINKS,
+    ):
+        """
+        :param initial: the page size of the first request
+        :param minimum: the smallest page size used
+        :param maximum: the largest page size used
+        :param target_latency: response time, in seconds, to stay under
+        :param max_shrinks: times a page is requested again after a timeout or server error before giving up
+        """
+        self._minimum = minimum
+        self._maximum = maximum
+        self._target_latency = target_latency
+        self._max_shrinks = max_shrinks
+        self.size = min(max(initial, minimum), maximum)
+
+    def _shrink(self) -> None:
+        self.size = max(self._minimum, self.size // 2)
+
+    def fetch(
+        self, fetch_page: Callable[[Optional[str], int], Dict], cursor: Optional[str]
+    ) -> Dict:
+        """
+        Requests a page, adjusting the page size for the next one
+        :param fetch_page: callable that receives a cursor and a page size and returns the decoded page
+        :param cursor: the cursor of the page
+        :return: the decoded page
+        """
+        shrinks = 0
+        while True:
+            start = perf_counter()
+            try:
+                page = fetch_page(cursor, self.size)
+            except Exception as e:
+                if (
+                    not _retryable(e)
+                    or shrinks >= self._max_shrinks
+                    or self.size <= self._minimum
+                ):
+                    raise
+                shrinks += 1
+                if sdk_config.timings:
+                    sdk_config.timings.record_retry()
+                self._shrink()
+                continue
+            elapsed = perf_counter() - start
+            if elapsed > self._target_latency:
+                self._shrink()
+            elif elapsed * 2 < self._target_latency:
+                self.size = min(self._maximum, self.size * 2)
+            return page
+
+
+def page_fetcher(
+    fetch_page: Callable[[Optional[str], int], Dict], default: int
+) -> Callable[[Optional[str]], Dict]:
+    """
+    :param fetch_page: callable that receives a cursor and a page size and returns the decoded page
+    :param default: the page size the operation uses by default
+    :return: a callable that receives a cursor and returns the decoded page, requested with the page size given by
+    --page-size, tuned on every request with --page-size auto
+    """
+    if sdk_config.auto_page_size:
+        tuner = AdaptivePageSize(list_page_size(default))
+        return lambda cursor: tuner.fetch(fetch_page, cursor)
+    return lambda cursor: fetch_page(cursor, list_page_size(default))
+
+
+def iter_entries(
+    fetch_page: Callable[[Optional[str]], Dict], cursor: Optional[str] = None
+) -> Iterator[Dict]:
+    """
+    :param fetch_page: callable that receives a cursor (None for the first page) and returns the decoded page
+    :param cursor: cursor to resume from
+    :return: an iterator over the entries of all pages, in order
+    """
+    return chain.from_iterable(iter_pages(fetch_page, cursor))
+
+
+def history_page(page: Dict) -> Dict:
+    """
+    :param page: a page of alert history, whose entries each carry the cursor that follows them
+    :return: the page with the cursor of the next one, like other cursor paginated operations
+    """
+    data = page.get("data", [])
+    return {"data": data, "cursor": data[-1]["cursor"] if data else None}
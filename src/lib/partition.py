@@ -0,0 +1,126 @@
+import heapq
+import re
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.lib.pipeline import map_ordered
+
+# date fields alerts can be partitioned on, and the key of each in the alerts returned by the API
+PARTITION_FIELDS = {
+    "created_at": "createdAt",
+    "updated_at": "updatedAt",
+    "opened_at": "openedAt",
+    "resolved_at": "resolvedAt",
+}
+
+_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+_SEVERITY_RANK = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3}
+
+
+def _format_timestamp(value: datetime) -> str:
+    # the format of the timestamps returned by the API, which the SDK also accepts in filters
+    return value.strftime("%Y-%m-%dT%H:%M:%S.") + f"{value.microsecond // 1000:03d}Z"
+
+
+def api_timestamp(value: str) -> str:
+    """
+    Normalizes a date given on the command line (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS) to the format of the timestamps
+    returned by the API, so that they can be compared as strings
+    """
+    return _format_timestamp(datetime.fromisoformat(value.rstrip("Z")))
+
+
+def parse_partition(spec: str) -> Tuple[str, timedelta]:
+    """
+    :param spec: a partitioning in the format FIELD:DURATION, e.g. created_at:1d or updated_at:12h
+    :return: the date field and the duration of each window
+    :raise ValueError: if the partitioning is not valid
+    """
+    field, _, duration = spec.partition(":")
+    match = re.fullmatch(r"(\d+)([smhdw])", duration.strip().lower())
+    if field not in PARTITION_FIELDS or not match or int(match.group(1)) == 0:
+        raise ValueError(
+            f"invalid partitioning {spec}, expected FIELD:DURATION with FIELD one of "
+            f"{', '.join(PARTITION_FIELDS)} and DURATION like 30m, 12h, 1d or 1w"
+        )
+    return field, timedelta(**{_UNITS[match.group(2)]: int(match.group(1))})
+
+
+def time_windows(
+    start: str, end: Optional[str], step: timedelta
+) -> List[Tuple[str, str]]:
+    """
+    Splits a date range into consecutive windows. Each window ends where the next one starts
+    :param start: start of the range, in the format YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS
+    :param end: end of the range, in the same format, now if None
+    :param step: duration of each window, the last one may be shorter
+    :return: the start and end of each window, in the format of the timestamps returned by the API (see api_timestamp)
+    """
+    current = datetime.fromisoformat(start.rstrip("Z"))
+    if end:
+        last = datetime.fromisoformat(end.rstrip("Z"))
+    else:
+        # dates on the command line are in UTC, without a time zone
+        last = datetime.now(timezone.utc).replace(tzinfo=None)
+    windows = []
+    while current < last:
+        following = min(current + step, last)
+        windows.append((_format_timestamp(current), _format_timestamp(following)))
+        current = following
+    return windows
+
+
+def _sort_key(order: str) -> Callable[[Dict], Tuple]:
+    if order == "severity":
+        return lambda alert: (_SEVERITY_RANK.get(alert.get("severity"), 4),)
+    # alerts without a value sort last, as they do in the API
+    return lambda alert: (alert.get(order) is None, alert.get(order) or "")
+
+
+def partitioned(
+    fetch: Callable[[str, str], Iterator[Dict]],
+    field: str,
+    windows: List[Tuple[str, str]],
+    order: str,
+    descending: bool,
+    concurrency: int,
+    limit: Optional[int] = None,
+) -> Iterator[Dict]:
+    """
+    Lists alerts of a date range by listing each of its windows concurrently, and stitches the results back in the
+    order the whole range would have been listed in. When alerts are sorted on the partition field, windows are
+    concatenated as they complete and at most 2 * concurrency windows are held in memory; otherwise all windows are
+    retrieved before being merged
+    :param fetch: callable that receives the start and end of a window and lists its alerts, sorted as requested
+    :param field: the date field the range is on, one of PARTITION_FIELDS
+    :param windows: the windows, as returned by time_windows
+    :param order: AlertsOrderOpts value of the field alerts are sorted on
+    :param descending: whether alerts are sorted in descending order
+    :param concurrency: maximum number of windows listed at the same time
+    :param limit: maximum number of alerts listed from each window, as no window contributes more to the output
+    :return: an iterator over the alerts
+    """
+    key = PARTITION_FIELDS[field]
+    ends = [end for _, end in windows]
+
+    def window(i: int) -> List[Dict]:
+        alerts = fetch(*windows[i])
+        if i < len(windows) - 1:
+            # the API filters are inclusive, so an alert on the boundary of two windows belongs to the later one
+            alerts = (alert for alert in alerts if (alert.get(key) or "") < ends[i])
+        return list(islice(alerts, limit))
+
+    indexes = range(len(windows))
+    if order == key:
+        if descending:
+            indexes = reversed(indexes)
+        for alerts in map_ordered(window, indexes, concurrency):
+            yield from alerts
+    else:
+        yield from heapq.merge(
+            *map_ordered(window, indexes, concurrency),
+            key=_sort_key(order),
+            reverse=descending,
+        )
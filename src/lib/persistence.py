@@ -0,0 +1,276 @@
+import hashlib
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from os.path import isfile
+from pathlib import Path
+from tempfile import mkstemp
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
+from uuid import UUID
+
+from zanshinsdk.alerts_history import FilePersistentAlertsIterator
+from zanshinsdk.client import CONFIG_DIR
+from zanshinsdk.following_alerts_history import FilePersistentFollowingAlertsIterator
+from zanshinsdk.iterator import PersistenceEntry
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+# entries output between state file updates, the page size used by the SDK for alert history
+DEFAULT_CHECKPOINT_EVERY: int = 100
+
+# where persistent exports kept their state, relative to the working directory, before it was kept per job
+LEGACY_STATE_FILE: str = "zanshin"
+
+
+def _fsync(path: str, flags: int) -> None:
+    fd = os.open(path, flags)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def replacing_file(filename: str) -> Iterator[str]:
+    """
+    :param filename: the file to replace
+    :return: a context with the name of a temporary file next to the given one, which replaces it once the context
+    exits without errors, so that an interruption while writing never leaves a truncated file behind
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, temporary = mkstemp(
+        dir=directory, prefix=f".{os.path.basename(filename)}.", suffix=".tmp"
+    )
+    os.close(fd)
+    try:
+        yield temporary
+        # the contents must reach the disk before the rename, or a crash could leave an empty file in its place
+        _fsync(temporary, os.O_RDWR)
+        os.replace(temporary, filename)
+        if hasattr(os, "O_DIRECTORY"):
+            _fsync(directory, os.O_RDONLY | os.O_DIRECTORY)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+class _AtomicSaveMixin:
+    """
+    Makes the SDK file persistent iterators write their state to a temporary file that then replaces the state file
+    """
+
+    def _save(self):
+        filename = self._filename
+        try:
+            with replacing_file(filename) as temporary:
+                # the SDK writes the state to self._filename, point it to the temporary file while it does
+                self._filename = temporary
+                super()._save()
+        finally:
+            self._filename = filename
+
+
+class _HistorySourceMixin:
+    """
+    Makes the SDK file persistent iterators retrieve alerts through the function given as iter_history, called with the
+    organization ID, filter IDs and cursor of the state, instead of the SDK list operation with its default page size
+    """
+
+    def __init__(
+        self,
+        *args,
+        iter_history: Optional[
+            Callable[[str, List[str], Optional[str]], Iterator[Dict]]
+        ] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self._iter_history = iter_history
+
+    def _load_alerts(self) -> Iterator[Dict]:
+        if self._iter_history is None:
+            return super()._load_alerts()
+        entry = self.persistence_entry
+        return self._iter_history(entry.organization_id, entry.filter_ids, entry.cursor)
+
+
+def _load_entry(filename: str, field_name: str) -> Optional[PersistenceEntry]:
+    # the SDK splits the saved IDs on whitespace, but joins them with commas
+    if not isfile(filename):
+        return None
+    with open(filename, "r") as f:
+        pe = json.load(f)
+    if "cursor" not in pe:
+        return None
+    # sorted, as exports pass their IDs sorted so the order they were given in doesn't matter
+    filter_ids = sorted(i for i in pe[field_name].split(",") if i)
+    return PersistenceEntry(pe["organization_id"], filter_ids, pe["cursor"])
+
+
+class AtomicFilePersistentAlertsIterator(
+    _HistorySourceMixin, _AtomicSaveMixin, FilePersistentAlertsIterator
+):
+    field_name = "scan_target_ids"
+
+    def _load(self):
+        return _load_entry(self.filename, self.field_name)
+
+
+class AtomicFilePersistentFollowingAlertsIterator(
+    _HistorySourceMixin, _AtomicSaveMixin, FilePersistentFollowingAlertsIterator
+):
+    field_name = "following_ids"
+
+    def _load(self):
+        return _load_entry(self.filename, self.field_name)
+
+
+class StateFileLockedError(Exception):
+    """Raised when another process is already using a persistent iterator state file."""
+
+
+def default_state_path(
+    command: str,
+    organization_id: Union[UUID, str],
+    filter_ids: Optional[Iterable[Union[UUID, str]]] = None,
+) -> Path:
+    """
+    :param command: the command exporting alerts, e.g. list_history
+    :param organization_id: the ID of the organization
+    :param filter_ids: the scan target or following IDs the export is restricted to
+    :return: where the state of a persistent export is kept unless another file is given, one file per job so that
+    exports of different organizations, scan targets or followings can run at the same time
+    """
+    key = ",".join(sorted(str(filter_id) for filter_id in filter_ids or []))
+    suffix = hashlib.sha256(key.encode()).hexdigest()[:16] if key else "all"
+    return CONFIG_DIR / "history" / f"{command}-{organization_id}-{suffix}.json"
+
+
+def adopt_legacy_state(
+    path: Path,
+    field_name: str,
+    organization_id: Union[UUID, str],
+    filter_ids: List[str],
+) -> bool:
+    """
+    Copies the state of an export started before state files were kept per job, in LEGACY_STATE_FILE in the working
+    directory, to the state file of the job, so that the export resumes where it stopped. Only done if the job has no
+    state file yet and the legacy state belongs to the same organization and filter
+    :param path: the state file of the job
+    :param field_name: scan_target_ids or following_ids
+    :param organization_id: the ID of the organization
+    :param filter_ids: the sorted scan target or following IDs the export is restricted to
+    :return: True if the legacy state was copied
+    """
+    if path.exists():
+        return False
+    try:
+        entry = _load_entry(LEGACY_STATE_FILE, field_name)
+    except (OSError, ValueError, KeyError):
+        return False
+    if (
+        entry is None
+        or str(entry.organization_id) != str(organization_id)
+        or entry.filter_ids != filter_ids
+    ):
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with replacing_file(str(path)) as temporary:
+        shutil.copyfile(LEGACY_STATE_FILE, temporary)
+    return True
+
+
+@contextmanager
+def state_file_lock(path: Path) -> Iterator[None]:
+    """
+    Holds an advisory lock on a state file, through a lock file next to it, for as long as the context is active
+    :param path: the state file
+    :raise StateFileLockedError: if another process holds the lock
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lock_path = path.with_name(path.name + ".lock")
+    fd = os.open(str(lock_path), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:  # pragma: no cover - Windows
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            raise StateFileLockedError(
+                f"{path} is in use by another export of the same alerts"
+            )
+        yield
+    finally:
+        # closing the descriptor releases the lock
+        os.close(fd)
+
+
+def shard_ids(ids: Iterable[Union[UUID, str]], shards: int) -> List[List[str]]:
+    """
+    Splits IDs into at most the given number of shards of about the same size. The split only depends on the set of
+    IDs, so that the same export always uses the same shards, and therefore the same state files
+    :param ids: the scan target or following IDs
+    :param shards: the number of shards
+    :return: the IDs of each non-empty shard
+    """
+    ordered = sorted({str(i) for i in ids})
+    return [ordered[i::shards] for i in range(shards) if ordered[i::shards]]
+
+
+class HistoryShard:
+    """
+    Cursor state of the alert history of a subset of an organization's scan targets, saved in the same format as the
+    state files of AtomicFilePersistentAlertsIterator. The cursor is only moved by the consumer, with the alerts it
+    already output, so state can be saved while the shard is being fetched on another thread
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        organization_id: Union[UUID, str],
+        scan_target_ids: List[str],
+        cursor: Optional[str] = None,
+    ):
+        """
+        :param path: the state file
+        :param organization_id: the ID of the organization
+        :param scan_target_ids: the scan targets of the shard
+        :param cursor: the cursor to start from, unless one was saved
+        """
+        self.path = path
+        self.organization_id = str(organization_id)
+        self.scan_target_ids = scan_target_ids
+        entry = _load_entry(str(path), "scan_target_ids")
+        if entry is not None:
+            if entry.organization_id != self.organization_id or sorted(
+                entry.filter_ids
+            ) != sorted(scan_target_ids):
+                raise ValueError(f"{path} is the state of another export")
+            cursor = entry.cursor
+        self.cursor = cursor
+        self._saved = cursor
+
+    def save(self) -> None:
+        """
+        Writes the cursor of the last alert output, if it moved since the last save
+        """
+        if self.cursor == self._saved:
+            return
+        with replacing_file(str(self.path)) as temporary:
+            with open(temporary, "w") as f:
+                json.dump(
+                    {
+                        "organization_id": self.organization_id,
+                        "scan_target_ids": ",".join(self.scan_target_ids),
+                        "cursor": str(self.cursor),
+                    },
+                    f,
+                )
+        self._saved = self.cursor
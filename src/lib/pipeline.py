@@ -0,0 +1,239 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_BATCH_SIZE: int = 100
+
+# how often, in seconds, a blocked producer checks whether the consumer went away
+_POLL_INTERVAL: float = 0.1
+
+
+class _Done:
+    pass
+
+
+class _Failure:
+    def __init__(self, exception: BaseException):
+        self.exception = exception
+
+
+def _put(queue: Queue, stop: Event, item: Any) -> bool:
+    # blocks until there is room in the queue, unless the consumer went away
+    while not stop.is_set():
+        try:
+            queue.put(item, timeout=_POLL_INTERVAL)
+            return True
+        except Full:
+            continue
+    return False
+
+
+def _read_ahead(items: Iterator[Any], depth: int) -> Iterator[Any]:
+    """
+    Consumes an iterator in a background thread, keeping at most depth items queued ahead of the caller. Order is
+    preserved, and exceptions raised by the iterator are re-raised on the calling thread after all items produced
+    before them
+    :param items: the iterator to consume
+    :param depth: maximum number of items produced ahead of the consumer
+    :return: an iterator over the same items
+    """
+    queue: Queue = Queue(maxsize=max(1, depth))
+    stop = Event()
+
+    def put(item) -> bool:
+        return _put(queue, stop, item)
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+            put(_Done())
+        except BaseException as e:
+            put(_Failure(e))
+
+    producer = Thread(target=produce, name="zanshin-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            try:
+                item = queue.get(timeout=_POLL_INTERVAL)
+            except Empty:
+                if not producer.is_alive() and queue.empty():
+                    return
+                continue
+            if isinstance(item, _Done):
+                return
+            if isinstance(item, _Failure):
+                raise item.exception
+            yield item
+    finally:
+        # waits for the item being produced, so that once closed the iterator is no longer used by the producer and
+        # can be closed by the caller
+        stop.set()
+        producer.join()
+
+
+def _batched(iterator: Iterator[Dict], batch_size: int) -> Iterator[List[Dict]]:
+    batch: List[Dict] = []
+    try:
+        for entry in iterator:
+            batch.append(entry)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    except Exception:
+        # entries fetched before a failure are still handed over
+        if batch:
+            yield batch
+        raise
+    if batch:
+        yield batch
+
+
+def prefetch(
+    iterator: Iterator[Dict], max_batches: int, batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[Dict]:
+    """
+    Consumes an iterator in a background thread, so that fetching from the API overlaps with rendering the output on
+    the calling thread. Entries are handed over in batches through a queue holding at most max_batches batches, which
+    bounds the memory used by entries fetched ahead of the output. Order is preserved, and exceptions raised by the
+    iterator are re-raised on the calling thread. Closing the returned iterator stops the background thread, waiting
+    for the entry it is fetching, after which the iterator consumed is free to be closed
+    :param iterator: the iterator to consume, usually an API list operation
+    :param max_batches: maximum number of batches fetched ahead of the consumer
+    :param batch_size: number of entries per batch
+    :return: an iterator over the same entries
+    """
+    batches = _read_ahead(_batched(iterator, batch_size), max_batches)
+    try:
+        for batch in batches:
+            yield from batch
+    finally:
+        batches.close()
+
+
+def iter_pages(
+    fetch_page: Callable[[Optional[str]], Dict],
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Iterator[List[Dict]]:
+    """
+    Walks a cursor paginated API operation, one page at a time
+    :param fetch_page: callable that receives a cursor (None for the first page) and returns the decoded page
+    :param cursor: cursor to resume from
+    :param limit: stop requesting pages once this many entries were returned
+    :return: an iterator over the data of each page
+    """
+    page = fetch_page(cursor)
+    data = page.get("data", [])
+    returned = len(data)
+    yield data
+    while page.get("cursor") and (limit is None or returned < limit):
+        page = fetch_page(page.get("cursor"))
+        data = page.get("data", [])
+        returned += len(data)
+        yield data
+
+
+def prefetch_pages(
+    fetch_page: Callable[[Optional[str]], Dict],
+    depth: int,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Iterator[Dict]:
+    """
+    Walks a cursor paginated API operation requesting the next page in a background thread while the current one is
+    being consumed, with at most depth pages read ahead. As each request needs the cursor returned by the previous
+    one, pages are still requested one after the other, but network time overlaps with processing the entries
+    :param fetch_page: callable that receives a cursor (None for the first page) and returns the decoded page
+    :param depth: maximum number of pages read ahead of the consumer
+    :param cursor: cursor to resume from
+    :param limit: stop requesting pages once this many entries were read, as the consumer won't need more
+    :return: an iterator over the entries of all pages, in order
+    """
+    pages = _read_ahead(iter_pages(fetch_page, cursor, limit), depth)
+    try:
+        for page in pages:
+            yield from page
+    finally:
+        pages.close()
+
+
+def map_ordered(
+    func: Callable[[Any], Any], items: Iterator[Any], concurrency: int
+) -> Iterator[Any]:
+    """
+    Applies func to every item using a pool of threads, yielding results in the same order as the items. At most
+    2 * concurrency items are in flight at any time, so memory stays bounded for arbitrarily long iterators
+    :param func: function to apply, usually one that performs an API request
+    :param items: the items to apply func to
+    :param concurrency: number of worker threads, 1 applies func serially on the calling thread
+    :return: an iterator over the results of func
+    """
+    if concurrency <= 1:
+        yield from map(func, items)
+        return
+
+    window: Deque = deque()
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="zanshin-worker"
+    ) as executor:
+        try:
+            for item in items:
+                window.append(executor.submit(func, item))
+                if len(window) >= 2 * concurrency:
+                    yield window.popleft().result()
+            while window:
+                yield window.popleft().result()
+        finally:
+            for future in window:
+                future.cancel()
+
+
+def merge(iterators: List[Iterator[Any]], depth: int) -> Iterator[Tuple[int, Any]]:
+    """
+    Consumes several iterators at the same time, each on its own thread, yielding items as they become available.
+    Items of each iterator keep their order, but items of different iterators are interleaved in no particular order.
+    Exceptions raised by any iterator are re-raised on the calling thread, which stops the others
+    :param iterators: the iterators to consume, usually API list operations
+    :param depth: maximum number of items produced ahead of the consumer, across all iterators
+    :return: an iterator over tuples of the index of the iterator and the item
+    """
+    queue: Queue = Queue(maxsize=max(1, depth))
+    stop = Event()
+
+    def produce(index: int, items: Iterator[Any]):
+        try:
+            for item in items:
+                if not _put(queue, stop, (index, item)):
+                    return
+            _put(queue, stop, (index, _Done()))
+        except BaseException as e:
+            _put(queue, stop, (index, _Failure(e)))
+
+    producers = [
+        Thread(target=produce, args=(i, items), name=f"zanshin-shard-{i}", daemon=True)
+        for i, items in enumerate(iterators)
+    ]
+    for producer in producers:
+        producer.start()
+    try:
+        remaining = len(producers)
+        while remaining:
+            try:
+                index, item = queue.get(timeout=_POLL_INTERVAL)
+            except Empty:
+                if not any(p.is_alive() for p in producers) and queue.empty():
+                    return
+                continue
+            if isinstance(item, _Done):
+                remaining -= 1
+            elif isinstance(item, _Failure):
+                raise item.exception
+            else:
+                yield index, item
+    finally:
+        stop.set()
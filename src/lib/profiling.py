@@ -0,0 +1,51 @@
+import cProfile
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+import typer
+
+# allocation sites listed in the memory profile
+DEFAULT_TOP_ALLOCATIONS: int = 10
+
+
+def start_cpu_profile(path: Path) -> Callable[[], None]:
+    """
+    Starts profiling the calling thread with cProfile
+    :param path: where the statistics are written, in the pstats format
+    :return: function that stops profiling and writes the statistics
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+    def stop() -> None:
+        profiler.disable()
+        profiler.dump_stats(str(path))
+        typer.echo(f"zanshin: CPU profile written to {path}", err=True)
+
+    return stop
+
+
+def start_memory_profile(
+    top: int = DEFAULT_TOP_ALLOCATIONS,
+) -> Callable[[], None]:
+    """
+    Starts tracing memory allocations with tracemalloc
+    :param top: number of allocation sites to report
+    :return: function that stops tracing and reports the peak memory usage and the sites with most memory allocated
+    """
+    tracemalloc.start()
+
+    def stop() -> None:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        typer.echo(
+            f"zanshin: peak memory {peak / 1024 / 1024:.1f} MiB, "
+            f"{current / 1024 / 1024:.1f} MiB still allocated",
+            err=True,
+        )
+        for statistic in snapshot.statistics("lineno")[:top]:
+            typer.echo(f"zanshin: {statistic}", err=True)
+
+    return stop
@@ -0,0 +1,61 @@
+import logging
+from functools import wraps
+from time import sleep
+from typing import Callable, Optional
+
+import httpx
+
+import src.config.sdk as sdk_config
+
+logger = logging.getLogger(__name__)
+
+TOO_MANY_REQUESTS: int = 429
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return max(0.0, float(response.headers.get("Retry-After")))
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_on_rate_limit(
+    func: Callable, max_retries: int, base_delay: float = 1.0
+) -> Callable:
+    """
+    Wraps a function that performs API requests so that it's retried when the API answers with HTTP 429 (Too Many
+    Requests), waiting for the time given in the Retry-After header or with exponential backoff otherwise. Meant to
+    guard work fanned out to several threads, where bursts can trip the API rate limits
+    :param func: the function to wrap, it's called again from the start on each retry
+    :param max_retries: maximum number of retries before giving up and re-raising the error
+    :param base_delay: delay in seconds before the first retry when the API doesn't provide one
+    :return: the wrapped function
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except httpx.HTTPStatusError as e:
+                if (
+                    e.response.status_code != TOO_MANY_REQUESTS
+                    or attempt >= max_retries
+                ):
+                    raise
+                delay = _retry_after(e.response)
+                if delay is None:
+                    delay = base_delay * 2**attempt
+                attempt += 1
+                if sdk_config.timings:
+                    sdk_config.timings.record_retry()
+                logger.debug(
+                    "rate limited, retrying in %.1fs (%d/%d)",
+                    delay,
+                    attempt,
+                    max_retries,
+                )
+                sleep(delay)
+
+    return wrapper
@@ -0,0 +1,124 @@
+from statistics import quantiles
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Iterator, List
+
+from zanshinsdk import Client
+
+
+class Timings:
+    """
+    Splits the wall time of a command into waiting for entries (API requests and pagination, or the queue of entries
+    fetched ahead with --prefetch-batches), writing the output and the rest of the output time, mostly formatting
+    entries and saving progress, along with the latency of each API request, to tell whether a command is bound by the API or
+    by the CLI. Also counts the requests retried and the bytes of output written, for --metrics-file. Totals are only
+    updated under a lock, as several threads may fetch and output entries at the same time, for instance with
+    --shard-dir
+    """
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.waiting = 0.0
+        self.output = 0.0
+        self.writing = 0.0
+        self.latencies: List[float] = []
+        self.retries = 0
+        self.written = 0
+        self._lock = Lock()
+
+    def record_request(self, seconds: float) -> None:
+        # requests may be made by worker threads
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def record_waiting(self, seconds: float) -> None:
+        with self._lock:
+            self.waiting += seconds
+
+    def record_output(self, seconds: float) -> None:
+        with self._lock:
+            self.output += seconds
+
+    def record_write(self, seconds: float, size: int) -> None:
+        with self._lock:
+            self.writing += seconds
+            self.written += size
+
+    def timed(self, iterator: Iterator[Any]) -> Iterator[Any]:
+        """
+        :param iterator: the entries being output
+        :return: the same entries, adding the time spent waiting for each to the waiting time
+        """
+        iterator = iter(iterator)
+        while True:
+            start = perf_counter()
+            try:
+                entry = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.record_waiting(perf_counter() - start)
+            yield entry
+
+    def instrument(self, client: Client) -> None:
+        """
+        Records the latency of every API request made by a client
+        :param client: the SDK client
+        """
+        request: Callable = client._request
+
+        def timed_request(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return request(*args, **kwargs)
+            finally:
+                self.record_request(perf_counter() - start)
+
+        client._request = timed_request
+
+    @property
+    def other(self) -> float:
+        """
+        The output time neither spent waiting for entries nor writing them, which isn't measured on its own: mostly
+        formatting entries and saving progress
+        """
+        return max(0.0, self.output - self.waiting - self.writing)
+
+    def report(self, entries: int) -> List[str]:
+        """
+        :param entries: number of entries output
+        :return: the lines of the report
+        """
+        elapsed = perf_counter() - self.start
+        lines = [
+            f"{entries} object(s) in {elapsed:.3f}s, {entries / elapsed if elapsed else 0:.1f} object(s)/s",
+            f"waiting for entries {self.waiting:.3f}s ({self._share(self.waiting, elapsed)})",
+            f"writing output      {self.writing:.3f}s ({self._share(self.writing, elapsed)})",
+            f"other output time   {self.other:.3f}s ({self._share(self.other, elapsed)}), mostly formatting and "
+            "saving progress",
+        ]
+        with self._lock:
+            latencies = sorted(self.latencies)
+        if latencies:
+            if len(latencies) > 1:
+                p50, p90, p99 = (
+                    quantiles(latencies, n=100, method="inclusive")[i - 1]
+                    for i in (50, 90, 99)
+                )
+            else:
+                p50 = p90 = p99 = latencies[0]
+            lines.append(
+                f"API requests        {len(latencies)} taking {sum(latencies):.3f}s, latency p50 {p50 * 1000:.0f}ms "
+                f"p90 {p90 * 1000:.0f}ms p99 {p99 * 1000:.0f}ms max {latencies[-1] * 1000:.0f}ms"
+            )
+        else:
+            lines.append("API requests        0")
+        return lines
+
+    @staticmethod
+    def _share(seconds: float, elapsed: float) -> str:
+        return f"{seconds / elapsed * 100 if elapsed else 0:.0f}%"
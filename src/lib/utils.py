@@ -1,12 +1,20 @@
+import csv
 from collections.abc import Mapping, Sequence
+from itertools import islice
 from json import dumps
-from typing import Any, Dict, Iterator, Union
+from tempfile import TemporaryFile
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Union
 
 import typer
 from prettytable import PrettyTable
 
 import src.config.sdk as sdk_config
+from src.lib.json_backend import json_dumps, json_loads
 from src.lib.models import OutputFormat
+from src.lib.output import OutputSink
+from src.lib.pipeline import prefetch
 
 
 def format_field(value: Any) -> str:
@@ -28,50 +36,251 @@ def format_field(value: Any) -> str:
 
 
 def dump_json(out: Union[dict, any]) -> None:
-    typer.echo(dumps(out, indent=4))
+    with OutputSink(sdk_config.buffer_size, timings=sdk_config.timings) as sink:
+        sink.writeline(json_dumps(out, indent=4))
+
+
+# output_iterable may run on several threads at once, e.g. writing a file per shard
+_entries_lock = Lock()
+
+
+class _Counted:
+    """
+    Iterator over the entries of another, counting them
+    """
+
+    def __init__(self, iterator: Iterator[Dict]):
+        self._iterator = iter(iterator)
+        self.count = 0
+
+    def __iter__(self) -> "_Counted":
+        return self
+
+    def __next__(self) -> Dict:
+        entry = next(self._iterator)
+        self.count += 1
+        return entry
+
+
+class _Checkpoint:
+    """
+    Runs the per entry callback of output_iterable once every few entries, flushing the output first so that state
+    saved by the callback (e.g. a persisted cursor) never gets ahead of what was actually written. It may lag behind,
+    as the sink also writes whenever its buffer fills: after an interruption, up to every entries are output again,
+    so delivery is at least once
+    """
+
+    def __init__(self, sink: OutputSink, function: Callable[[], Any], every: int):
+        self._sink = sink
+        self._function = function
+        self._every = max(1, every)
+        self._pending = 0
+
+    def __call__(self) -> None:
+        self._pending += 1
+        if self._pending >= self._every:
+            self.finish()
+
+    def defer(self) -> None:
+        """
+        Counts an entry without running the callback, for formats that only write output once all entries were read,
+        so that the callback only runs from finish, after the output was written
+        """
+        self._pending += 1
+
+    def finish(self) -> None:
+        """
+        Runs the callback if any entry was output since it last ran
+        """
+        if self._pending:
+            self._sink.flush()
+            self._function()
+            self._pending = 0
+
+
+def _output_csv_with_columns(
+    sink: OutputSink,
+    iterator: Iterator[Dict],
+    columns: List[str],
+    empty: Any = None,
+    _each_iteration_function: Any = None,
+) -> None:
+    """
+    Streams entries as CSV rows using a declared set of columns, writing each row as soon as the entry arrives. Keys
+    that are not part of the declared columns are ignored
+    :param sink: where to write the output
+    :param iterator: the iterator containing the JSON objects
+    :param columns: the column names, in output order
+    :param empty: value to use for columns missing from an entry
+    :param _each_iteration_function: optional callable invoked after each entry
+    :return: None
+    """
+    writer = csv.writer(sink)
+    writer.writerow(columns)
+    for entry in iterator:
+        writer.writerow([format_field(entry.get(c, empty)) for c in columns])
+        if _each_iteration_function:
+            _each_iteration_function()
+
+
+def _output_csv_spilled(
+    sink: OutputSink,
+    iterator: Iterator[Dict],
+    empty: Any = None,
+    _each_iteration_function: Any = None,
+) -> None:
+    """
+    Outputs entries as CSV rows when the columns are not known in advance. Rows are spilled to a temporary file as
+    they arrive while the set of columns is collected, and then replayed with the final header, so memory usage
+    stays flat regardless of the number of entries. Column order matches the table output: keys of the first entry
+    sorted, followed by keys that show up later in order of appearance
+    :param sink: where to write the output
+    :param iterator: the iterator containing the JSON objects
+    :param empty: value to use for columns missing from an entry
+    :param _each_iteration_function: optional callable invoked after each entry
+    :return: None
+    """
+    columns: List[str] = []
+    positions: Dict[str, int] = {}
+    with TemporaryFile("w+", encoding="utf-8") as spill:
+        for entry in iterator:
+            if not columns:
+                columns.extend(sorted(entry.keys()))
+                positions.update({c: i for i, c in enumerate(columns)})
+            else:
+                for k in entry.keys():
+                    if k not in positions:
+                        positions[k] = len(columns)
+                        columns.append(k)
+            row = [empty] * len(columns)
+            for k, v in entry.items():
+                row[positions[k]] = format_field(v)
+            spill.write(json_dumps(row, default=str))
+            spill.write("\n")
+            if _each_iteration_function:
+                _each_iteration_function()
+
+        spill.seek(0)
+        writer = csv.writer(sink)
+        writer.writerow(columns)
+        for line in spill:
+            row = json_loads(line)
+            row.extend([empty] * (len(columns) - len(row)))
+            writer.writerow(row)
 
 
 def output_iterable(
-    iterator: Iterator[Dict], empty: Any = None, _each_iteration_function: Any = None
+    iterator: Iterator[Dict],
+    empty: Any = None,
+    _each_iteration_function: Any = None,
+    checkpoint_every: int = 1,
+    file: Optional[TextIO] = None,
 ) -> None:
     """
     Function that iterates over a series of dicts representing JSON objects returned by API list operations, and which
-    outputs them using typer.echo in the specified format. Will use streaming processing for JSON, all others need to
-    load all responses in memory in a PrettyTable prior to output, which could be problematic for large number of
-    entries
-    :param _each_iteration_function:
+    outputs them in the specified format through a buffered OutputSink. Will use streaming processing for JSON, JSON
+    Lines and CSV (see _output_csv_with_columns and _output_csv_spilled), all others need to load all responses in
+    memory in a PrettyTable prior to output, which could be problematic for large number of entries. The count format
+    only outputs the number of entries, without formatting any of them or saving progress. When prefetching
+    is enabled, the iterator is consumed in a background thread so that fetching overlaps with output. When a limit is
+    set, iteration stops once that many entries were output. The number of entries output is added to
+    sdk_config.entries, also when several outputs run at the same time
+    :param _each_iteration_function: optional callable to save progress, invoked once the output of the entries
+    iterated so far was written
+    :param checkpoint_every: number of entries between calls of _each_iteration_function, which is also called after
+    the last entry
+    :param file: where the output is written, stdout by default
     :param empty:
     :param iterator: the iterator containing the JSON objects
     :return: None
     """
 
-    sdk_config.entries = 0
-    if sdk_config.format is OutputFormat.JSON:
-        for entry in iterator:
-            typer.echo(dumps(entry, indent=4))
-            sdk_config.entries += 1
+    if sdk_config.format is OutputFormat.COUNT:
+        # no entries are output, so there's no progress to save: a persisted export is left where it was
+        _each_iteration_function = None
+    source = iterator
+    if sdk_config.limit:
+        # stops pulling from the iterator, so later pages are never requested
+        iterator = islice(iterator, sdk_config.limit)
+    prefetched = None
+    if sdk_config.prefetch_batches and not _each_iteration_function:
+        # persistent iterators save the cursor of the last entry fetched, so they can't be read ahead of the output
+        iterator = prefetched = prefetch(iterator, sdk_config.prefetch_batches)
+    if sdk_config.timings:
+        iterator = sdk_config.timings.timed(iterator)
+        start = perf_counter()
+    iterator = _Counted(iterator)
+    try:
+        with OutputSink(sdk_config.buffer_size, file, sdk_config.timings) as sink:
             if _each_iteration_function:
-                _each_iteration_function()
-    else:
-        table = PrettyTable()
-        for entry in iterator:
-            if not table.field_names:
-                table.field_names = sorted(entry.keys())
+                _each_iteration_function = _Checkpoint(
+                    sink, _each_iteration_function, checkpoint_every
+                )
+            if sdk_config.format is OutputFormat.COUNT:
+                for _ in iterator:
+                    pass
+                sink.writeline(str(iterator.count))
+            elif sdk_config.format is OutputFormat.JSON:
+                for entry in iterator:
+                    sink.writeline(json_dumps(entry, indent=4))
+                    if _each_iteration_function:
+                        _each_iteration_function()
+            elif sdk_config.format is OutputFormat.JSONL:
+                for entry in iterator:
+                    sink.writeline(json_dumps(entry))
+                    if _each_iteration_function:
+                        _each_iteration_function()
+            elif sdk_config.format is OutputFormat.CSV and sdk_config.csv_columns:
+                _output_csv_with_columns(
+                    sink,
+                    iterator,
+                    sdk_config.csv_columns,
+                    empty,
+                    _each_iteration_function,
+                )
             else:
-                for k in entry.keys():
-                    if k not in table.field_names:
-                        table.add_column(k, [empty] * sdk_config.entries)
-            table.add_row(
-                [format_field(entry.get(fn, empty)) for fn in table.field_names]
-            )
-            sdk_config.entries += 1
+                # these formats only write once all entries were read, so progress is saved once, after that
+                deferred = _each_iteration_function and _each_iteration_function.defer
+                if sdk_config.format is OutputFormat.CSV:
+                    _output_csv_spilled(sink, iterator, empty, deferred)
+                else:
+                    _output_table(sink, iterator, empty, deferred)
             if _each_iteration_function:
-                _each_iteration_function()
-        if sdk_config.format is OutputFormat.TABLE:
-            typer.echo(table.get_string())
-        elif sdk_config.format is OutputFormat.CSV:
-            typer.echo(table.get_csv_string())
-        elif sdk_config.format is OutputFormat.HTML:
-            typer.echo(table.get_html_string())
+                _each_iteration_function.finish()
+    finally:
+        # also when the output failed, so that --timings and --metrics-file describe the run up to the failure
+        with _entries_lock:
+            sdk_config.entries += iterator.count
+        if prefetched is not None:
+            # stops the thread reading the source, which must not be closed while that thread is using it
+            prefetched.close()
+        if sdk_config.limit and hasattr(source, "close"):
+            # stops threads reading ahead of the source right away, rather than once it's garbage collected
+            source.close()
+        if sdk_config.timings:
+            sdk_config.timings.record_output(perf_counter() - start)
+
+
+def _output_table(
+    sink: OutputSink,
+    iterator: Iterator[Dict],
+    empty: Any = None,
+    _each_iteration_function: Any = None,
+) -> None:
+    table = PrettyTable()
+    for entry in iterator:
+        if not table.field_names:
+            table.field_names = sorted(entry.keys())
         else:
-            raise NotImplementedError(f"unexpected format type {sdk_config.format}")
+            for k in entry.keys():
+                if k not in table.field_names:
+                    table.add_column(k, [empty] * table.rowcount)
+        table.add_row([format_field(entry.get(fn, empty)) for fn in table.field_names])
+        if _each_iteration_function:
+            _each_iteration_function()
+    if sdk_config.format is OutputFormat.TABLE:
+        sink.writeline(table.get_string())
+    elif sdk_config.format is OutputFormat.HTML:
+        sink.writeline(table.get_html_string())
+    else:
+        raise NotImplementedError(f"unexpected format type {sdk_config.format}")
@@ -0,0 +1,566 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import httpx
+from typer.testing import CliRunner
+from zanshinsdk import Client
+
+import src.config.sdk as sdk_config
+from src.lib.alert_mirror import AlertMirror
+from src.lib.models import OutputFormat
+from src.lib.persistence import default_state_path, state_file_lock
+from src.lib.ratelimit import retry_on_rate_limit
+from src.main import main_app
+
+runner = CliRunner()
+
+ORGANIZATION_ID = "822f4225-43e9-4922-b6b8-8b0620bdb1e3"
+
+FOLLOWINGS = [{"id": f"following-{i}", "name": f"Following {i}"} for i in range(6)]
+
+
+def following_alerts(following_ids, **kwargs):
+    i = int(following_ids[0].split("-")[1])
+    alerts = [
+        {"state": "OPEN", "tags": ["cis"]},
+        {"state": "CLOSED", "tags": ["cis", "pci"]},
+        {"state": "RISK_ACCEPTED", "tags": []},
+    ]
+    return iter(alerts[: 1 + i % 3])
+
+
+class TestAlertCategoryReport(unittest.TestCase):
+    def setUp(self):
+        sdk_config.profile = "default"
+
+    def tearDown(self):
+        sdk_config.format = OutputFormat.JSON
+
+    def report(self, *args):
+        with patch("src.bin.alerts.get_client") as client:
+            client.return_value.iter_organization_following.return_value = FOLLOWINGS
+            client.return_value.iter_following_alerts.side_effect = following_alerts
+            result = runner.invoke(
+                main_app,
+                [
+                    "--no-verbose",
+                    "--format",
+                    "jsonl",
+                    "alert",
+                    "generate_alert_category_report",
+                    ORGANIZATION_ID,
+                    *args,
+                ],
+            )
+        self.assertEqual(0, result.exit_code, result.output)
+        return result.stdout
+
+    def test_concurrent_report_matches_sequential(self):
+        sequential = self.report("--concurrency", "1")
+        self.assertEqual(sequential, self.report("--concurrency", "4"))
+        self.assertTrue(
+            sequential.startswith(
+                '{"ID":"GLOBAL","NAME":"Global Avarage","CIS":33.3,"PCI":100.0,"UNCATEGORIZED":100.0}\n'
+            ),
+            sequential,
+        )
+
+
+class TestIncrementalAlertCategoryReport(unittest.TestCase):
+    def setUp(self):
+        sdk_config.profile = "default"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.snapshot = str(Path(self.tmp.name) / "report.db")
+        self.alerts = {
+            "a": {"id": "a", "state": "OPEN", "tags": ["cis"], "updatedAt": "1"},
+            "b": {
+                "id": "b",
+                "state": "CLOSED",
+                "tags": ["cis", "pci"],
+                "updatedAt": "2",
+            },
+        }
+        self.requests = []
+
+    def tearDown(self):
+        sdk_config.format = OutputFormat.JSON
+        self.tmp.cleanup()
+
+    def following_alerts(self, updated_at_start=None, **kwargs):
+        self.requests.append(updated_at_start)
+        return iter(
+            [
+                a
+                for a in self.alerts.values()
+                if not updated_at_start or a["updatedAt"] >= updated_at_start
+            ]
+        )
+
+    def report(self, *args):
+        with patch("src.bin.alerts.get_client") as client:
+            client.return_value.iter_organization_following.return_value = FOLLOWINGS[
+                :1
+            ]
+            client.return_value.iter_following_alerts.side_effect = (
+                self.following_alerts
+            )
+            result = runner.invoke(
+                main_app,
+                [
+                    "--no-verbose",
+                    "--format",
+                    "jsonl",
+                    "alert",
+                    "generate_alert_category_report",
+                ]
+                + [ORGANIZATION_ID, *args],
+            )
+        self.assertEqual(0, result.exit_code, result.output)
+        return result.stdout
+
+    def test_applies_updated_alerts_as_deltas(self):
+        incremental = ["--incremental", "--snapshot-file", self.snapshot]
+        self.assertEqual(self.report(), self.report(*incremental))
+
+        self.alerts["a"] = {"id": "a", "state": "CLOSED", "tags": [], "updatedAt": "3"}
+        self.alerts["c"] = {
+            "id": "c",
+            "state": "OPEN",
+            "tags": ["pci"],
+            "updatedAt": "3",
+        }
+        updated = self.report(*incremental)
+        self.assertEqual("2", self.requests[-1])
+        # same values as retrieving everything again, key order follows when tags were first seen
+        self.assertEqual(
+            [json.loads(line) for line in self.report().splitlines()],
+            [json.loads(line) for line in updated.splitlines()],
+        )
+
+
+class TestAlertSync(unittest.TestCase):
+    def setUp(self):
+        sdk_config.profile = "default"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.mirror = str(Path(self.tmp.name) / "mirror.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def sync(self, alerts, *options):
+        with patch("src.bin.alerts.get_client") as client:
+            client.return_value.iter_alerts.return_value = iter(alerts)
+            result = runner.invoke(
+                main_app,
+                ["--no-verbose", *options, "alert", "sync", ORGANIZATION_ID]
+                + ["--mirror-file", self.mirror],
+            )
+            self.assertEqual(0, result.exit_code, result.output)
+            return client.return_value.iter_alerts.call_args.kwargs, json.loads(
+                result.stdout
+            )
+
+    def test_fetches_only_updated_alerts(self):
+        kwargs, summary = self.sync(
+            [
+                {"id": "a", "state": "OPEN", "updatedAt": "2024-01-01T00:00:00.000Z"},
+                {"id": "b", "state": "OPEN", "updatedAt": "2024-01-02T00:00:00.000Z"},
+            ]
+        )
+        self.assertIsNone(kwargs["updated_at_start"])
+        self.assertEqual(2, summary["total"])
+
+        kwargs, summary = self.sync(
+            [{"id": "a", "state": "CLOSED", "updatedAt": "2024-01-03T00:00:00.000Z"}]
+        )
+        self.assertEqual("2024-01-02T00:00:00.000Z", kwargs["updated_at_start"])
+        self.assertEqual(
+            {
+                "organizationId": ORGANIZATION_ID,
+                "updated": 1,
+                "total": 2,
+                "watermark": "2024-01-03T00:00:00.000Z",
+            },
+            summary,
+        )
+
+    def test_page_size(self):
+        kwargs, _ = self.sync([], "--page-size", "250")
+        self.assertEqual(250, kwargs["page_size"])
+
+
+class TestAlertHistoryPersist(unittest.TestCase):
+    SCAN_TARGET_ID = "4a1b2c3d-0000-4000-8000-000000000001"
+
+    def setUp(self):
+        sdk_config.profile = "default"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state = Path(self.tmp.name) / "state.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def export(self, alerts, *args, options=()):
+        client = MagicMock(spec=Client)
+        client.iter_alerts_history.return_value = iter(alerts)
+        args = args or ("--state-file", str(self.state))
+        with patch("src.bin.alerts.get_client", return_value=client):
+            result = runner.invoke(
+                main_app,
+                ["--no-verbose", "--format", "jsonl", *options]
+                + ["alert", "list_history"]
+                + [ORGANIZATION_ID, "--persist", *args]
+                + ["--scan-target-id", self.SCAN_TARGET_ID],
+            )
+        return client.iter_alerts_history.call_args, result
+
+    def test_resumes_from_saved_cursor(self):
+        _, result = self.export(
+            [{"id": "a", "cursor": "c1"}, {"id": "b", "cursor": "c2"}]
+        )
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual("c2", json.loads(self.state.read_text())["cursor"])
+
+        call, result = self.export([])
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual("c2", call.kwargs["cursor"])
+        self.assertEqual([self.SCAN_TARGET_ID], call.kwargs["scan_target_ids"])
+
+    def test_page_size(self):
+        call, result = self.export([], options=("--page-size", "250"))
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual(250, call.kwargs["page_size"])
+
+    def test_scan_target_order_does_not_matter(self):
+        other = "4a1b2c3d-0000-4000-8000-000000000002"
+        with patch("src.lib.persistence.CONFIG_DIR", Path(self.tmp.name)):
+            _, result = self.export(
+                [{"id": "a", "cursor": "c1"}], "--scan-target-id", other
+            )
+            self.assertEqual(0, result.exit_code, result.output)
+            client = MagicMock(spec=Client)
+            client.iter_alerts_history.return_value = iter([])
+            with patch("src.bin.alerts.get_client", return_value=client):
+                result = runner.invoke(
+                    main_app,
+                    ["--no-verbose", "alert", "list_history", ORGANIZATION_ID]
+                    + ["--persist", "--scan-target-id", other]
+                    + ["--scan-target-id", self.SCAN_TARGET_ID],
+                )
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual("c1", client.iter_alerts_history.call_args.kwargs["cursor"])
+
+    def test_resumes_from_legacy_state_file(self):
+        legacy = Path(self.tmp.name) / "zanshin"
+        legacy.write_text(
+            json.dumps(
+                {
+                    "organization_id": ORGANIZATION_ID,
+                    "scan_target_ids": self.SCAN_TARGET_ID,
+                    "cursor": "c1",
+                }
+            )
+        )
+        with patch("src.lib.persistence.CONFIG_DIR", Path(self.tmp.name)), patch(
+            "src.lib.persistence.LEGACY_STATE_FILE", str(legacy)
+        ):
+            call, result = self.export(
+                [{"id": "b", "cursor": "c2"}], "--checkpoint-every", "100"
+            )
+            path = default_state_path(
+                "list_history", ORGANIZATION_ID, [self.SCAN_TARGET_ID]
+            )
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual("c1", call.kwargs["cursor"])
+        self.assertEqual("c2", json.loads(path.read_text())["cursor"])
+
+    def test_refuses_state_file_in_use(self):
+        with state_file_lock(self.state):
+            _, result = self.export([{"id": "a", "cursor": "c1"}])
+        self.assertEqual(1, result.exit_code)
+        self.assertFalse(self.state.exists())
+
+    def test_state_file_per_job(self):
+        paths = {
+            default_state_path("list_history", ORGANIZATION_ID),
+            default_state_path("list_history", ORGANIZATION_ID, ["b", "a"]),
+            default_state_path("list_history", ORGANIZATION_ID, ["a", "b"]),
+            default_state_path("list_history_following", ORGANIZATION_ID),
+        }
+        self.assertEqual(3, len(paths))
+
+
+class TestAlertHistorySharded(unittest.TestCase):
+    SCAN_TARGET_IDS = [f"4a1b2c3d-0000-4000-8000-00000000000{i}" for i in range(5)]
+
+    def setUp(self):
+        sdk_config.profile = "default"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config_dir = patch(
+            "src.lib.persistence.CONFIG_DIR", Path(self.tmp.name) / "config"
+        )
+        self.config_dir.start()
+
+    def tearDown(self):
+        self.config_dir.stop()
+        self.tmp.cleanup()
+
+    @staticmethod
+    def history(organization_id, scan_target_ids, cursor=None, **kwargs):
+        alerts = [
+            {"id": f"{scan_target_id}-{n}", "cursor": f"{scan_target_id}-{n}"}
+            for scan_target_id in scan_target_ids
+            for n in range(3)
+        ]
+        if cursor:
+            alerts = alerts[[a["cursor"] for a in alerts].index(cursor) + 1 :]
+        return iter(alerts)
+
+    def invoke(self, *args, verbose=False, output_format="jsonl"):
+        with patch("src.bin.alerts.get_client") as client:
+            client.return_value.iter_alerts_history.side_effect = self.history
+            result = runner.invoke(
+                main_app,
+                ["--verbose" if verbose else "--no-verbose", "--format", output_format]
+                + ["alert", "list_history", ORGANIZATION_ID, "--shards", "2", *args]
+                + [
+                    arg for i in self.SCAN_TARGET_IDS for arg in ("--scan-target-id", i)
+                ],
+            )
+        return client.return_value.iter_alerts_history.call_args_list, result
+
+    def export(self, *args):
+        calls, result = self.invoke(*args)
+        self.assertEqual(0, result.exit_code, result.output)
+        return calls, result.stdout
+
+    def test_merges_all_shards(self):
+        calls, out = self.export()
+        self.assertEqual(
+            [[0, 2, 4], [1, 3]],
+            [
+                [self.SCAN_TARGET_IDS.index(i) for i in call.kwargs["scan_target_ids"]]
+                for call in sorted(calls, key=lambda c: c.kwargs["scan_target_ids"])
+            ],
+        )
+        ids = sorted(json.loads(line)["id"] for line in out.splitlines())
+        self.assertEqual(
+            sorted(f"{i}-{n}" for i in self.SCAN_TARGET_IDS for n in range(3)), ids
+        )
+
+    def test_persisted_shards_resume_on_their_own(self):
+        self.export("--persist", "--checkpoint-every", "4")
+        calls, out = self.export("--persist")
+        self.assertEqual("", out)
+        self.assertEqual(
+            {self.SCAN_TARGET_IDS[4] + "-2", self.SCAN_TARGET_IDS[3] + "-2"},
+            {call.kwargs["cursor"] for call in calls},
+        )
+
+    def test_file_per_shard(self):
+        shard_dir = Path(self.tmp.name) / "shards"
+        _, result = self.invoke("--shard-dir", str(shard_dir), verbose=True)
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertTrue(result.output.startswith("zanshin: 15 object(s) processed"))
+        self.assertEqual(
+            [9, 6],
+            [
+                len((shard_dir / f"shard-{i}.jsonl").read_text().splitlines())
+                for i in range(2)
+            ],
+        )
+
+    def test_requires_scan_targets(self):
+        with patch("src.bin.alerts.get_client"):
+            result = runner.invoke(
+                main_app, ["alert", "list_history", ORGANIZATION_ID, "--shards", "2"]
+            )
+        self.assertEqual(2, result.exit_code)
+        self.assertIn("--scan-target-id", result.output)
+
+    def test_persisted_shard_files_require_json(self):
+        shard_dir = Path(self.tmp.name) / "shards"
+        _, result = self.invoke(
+            "--no-verbose",
+            "--shard-dir",
+            str(shard_dir),
+            "--persist",
+            output_format="csv",
+        )
+        self.assertEqual(2, result.exit_code)
+        self.assertFalse(shard_dir.exists())
+
+
+class TestAlertListLocal(unittest.TestCase):
+    ALERTS = [
+        {
+            "id": "a",
+            "scanTargetId": "st-1",
+            "state": "OPEN",
+            "severity": "LOW",
+            "title": "Public bucket",
+            "createdAt": "2024-01-01T10:00:00.000Z",
+            "updatedAt": "2024-01-01T10:00:00.000Z",
+        },
+        {
+            "id": "b",
+            "scanTargetId": "st-2",
+            "state": "OPEN",
+            "severity": "CRITICAL",
+            "title": "Root account without MFA",
+            "createdAt": "2024-01-02T10:00:00.000Z",
+            "updatedAt": "2024-01-02T10:00:00.000Z",
+        },
+        {
+            "id": "c",
+            "scanTargetId": "st-2",
+            "state": "CLOSED",
+            "severity": "HIGH",
+            "title": "Old access key",
+            "createdAt": "2024-01-03T10:00:00.000Z",
+            "updatedAt": "2024-01-03T10:00:00.000Z",
+        },
+    ]
+
+    def setUp(self):
+        sdk_config.profile = "default"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.mirror = Path(self.tmp.name) / "mirror.sqlite3"
+        with AlertMirror(self.mirror, ORGANIZATION_ID) as mirror:
+            mirror.upsert(iter(self.ALERTS))
+            mirror.replace_scan_targets([{"id": "st-2", "tags": ["prod"]}])
+
+    def tearDown(self):
+        sdk_config.format = OutputFormat.JSON
+        self.tmp.cleanup()
+
+    def ids(self, *args):
+        with patch("src.bin.alerts.get_client") as client:
+            result = runner.invoke(
+                main_app,
+                ["--no-verbose", "--format", "jsonl", "alert", "list", ORGANIZATION_ID]
+                + ["--local", "--mirror-file", str(self.mirror), *args],
+            )
+            client.assert_not_called()
+        self.assertEqual(0, result.exit_code, result.output)
+        return [json.loads(line)["id"] for line in result.stdout.splitlines()]
+
+    def test_default_filters_and_severity_order(self):
+        self.assertEqual(["b", "a"], self.ids())
+
+    def test_filters(self):
+        self.assertEqual(
+            ["b", "c"],
+            self.ids(
+                "--scan-target-tags", "prod", "--states", "OPEN", "--states", "CLOSED"
+            ),
+        )
+        self.assertEqual(["a"], self.ids("--severities", "LOW"))
+        self.assertEqual(["b"], self.ids("--search", "mfa"))
+        self.assertEqual(
+            ["b"],
+            self.ids(
+                "--created-at-start",
+                "2024-01-02",
+                "--created-at-end",
+                "2024-01-02T23:59:59",
+            ),
+        )
+        self.assertEqual(["a", "b"], self.ids("--order", "createdAt", "--sort", "ASC"))
+
+    def test_invalid_date(self):
+        result = runner.invoke(
+            main_app,
+            ["--no-verbose", "alert", "list", ORGANIZATION_ID, "--local"]
+            + ["--mirror-file", str(self.mirror), "--opened-at-start", "yesterday"],
+        )
+        self.assertEqual(2, result.exit_code)
+        self.assertIn("Invalid value for --opened-at-start", result.output)
+
+
+class TestAlertListPartitioned(unittest.TestCase):
+    ALERTS = [
+        {"id": "a", "createdAt": "2024-01-01T05:00:00.000Z"},
+        {"id": "b", "createdAt": "2024-01-02T00:00:00.000Z"},
+        {"id": "c", "createdAt": "2024-01-02T20:00:00.000Z"},
+    ]
+
+    def setUp(self):
+        sdk_config.profile = "default"
+        self.requests = []
+
+    def tearDown(self):
+        sdk_config.format = OutputFormat.JSON
+        sdk_config.page_size = None
+
+    def request(self, method, path, body=None, params=None):
+        """Answers alert list requests like the API, through the SDK's request validation."""
+        self.requests.append((body, params))
+        data = [
+            alert
+            for alert in self.ALERTS
+            if body["createdAtStart"] <= alert["createdAt"][:19] <= body["createdAtEnd"]
+        ]
+        return MagicMock(json=MagicMock(return_value={"data": data}))
+
+    def test_windows_are_accepted_by_the_sdk(self):
+        client = Client(profile=None, api_key="key")
+        with patch.object(client, "_request", side_effect=self.request), patch(
+            "src.bin.alerts.get_client", return_value=client
+        ):
+            result = runner.invoke(
+                main_app,
+                ["--no-verbose", "--format", "jsonl", "--page-size", "50"]
+                + ["alert", "list", ORGANIZATION_ID, "--order", "createdAt"]
+                + ["--sort", "ASC", "--created-at-start", "2024-01-01"]
+                + ["--created-at-end", "2024-01-03", "--partition-by", "created_at:1d"],
+            )
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual(
+            ["a", "b", "c"],
+            [json.loads(line)["id"] for line in result.stdout.splitlines()],
+        )
+        self.assertEqual(
+            [("2024-01-01T00:00:00", "2024-01-02T00:00:00", 50)]
+            + [("2024-01-02T00:00:00", "2024-01-03T00:00:00", 50)],
+            sorted(
+                (body["createdAtStart"], body["createdAtEnd"], params["size"])
+                for body, params in self.requests
+            ),
+        )
+
+
+class TestRetryOnRateLimit(unittest.TestCase):
+    def test_retries_too_many_requests(self):
+        calls = []
+        request = httpx.Request("GET", "https://api.example.com")
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                response = httpx.Response(
+                    429, headers={"Retry-After": "0"}, request=request
+                )
+                response.raise_for_status()
+            return "ok"
+
+        self.assertEqual("ok", retry_on_rate_limit(flaky, 5)())
+        self.assertEqual(3, len(calls))
+
+    def test_gives_up_after_max_retries(self):
+        request = httpx.Request("GET", "https://api.example.com")
+
+        def limited():
+            httpx.Response(
+                429, headers={"Retry-After": "0"}, request=request
+            ).raise_for_status()
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            retry_on_rate_limit(limited, 1)()
+
+
+if __name__ == "__main__":
+    unittest.main()
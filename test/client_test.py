@@ -0,0 +1,24 @@
+import unittest
+from unittest.mock import patch
+
+import src.lib.client
+from src.lib.client import get_client
+
+
+class TestGetClient(unittest.TestCase):
+    def setUp(self):
+        src.lib.client._clients.clear()
+
+    def tearDown(self):
+        src.lib.client._clients.clear()
+
+    def test_one_client_per_profile(self):
+        with patch("src.lib.client.Client", side_effect=lambda profile: object()):
+            default = get_client("default")
+            self.assertIs(default, get_client("default"))
+            self.assertIsNot(default, get_client("other"))
+            self.assertIs(default, get_client("default"))
+
+
+if __name__ == "__main__":
+    unittest.main()
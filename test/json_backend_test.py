@@ -0,0 +1,46 @@
+import unittest
+from unittest.mock import patch
+
+import src.config.sdk as sdk_config
+import src.lib.json_backend as json_backend
+from src.lib.json_backend import json_dumps, json_loads
+from src.lib.models import JSONBackend
+
+ENTRY = {"id": "1", "title": "Configuração", "tags": ["a", "b"], "count": 3}
+
+
+@unittest.skipUnless(json_backend.orjson_available(), "orjson is not installed")
+class TestJSONBackend(unittest.TestCase):
+    def tearDown(self):
+        sdk_config.json_backend = JSONBackend.AUTO
+
+    def test_compact_output_is_identical_across_backends(self):
+        sdk_config.json_backend = JSONBackend.STDLIB
+        stdlib = json_dumps(ENTRY)
+        sdk_config.json_backend = JSONBackend.AUTO
+        self.assertEqual(stdlib, json_dumps(ENTRY))
+        sdk_config.json_backend = JSONBackend.ORJSON
+        self.assertEqual(stdlib, json_dumps(ENTRY))
+
+    def test_auto_indented_output_uses_stdlib(self):
+        sdk_config.json_backend = JSONBackend.STDLIB
+        stdlib = json_dumps(ENTRY, indent=4)
+        sdk_config.json_backend = JSONBackend.AUTO
+        self.assertEqual(stdlib, json_dumps(ENTRY, indent=4))
+
+    def test_falls_back_to_stdlib_on_unsupported_values(self):
+        sdk_config.json_backend = JSONBackend.ORJSON
+        self.assertEqual('{"n":18446744073709551616}', json_dumps({"n": 2**64}))
+
+    def test_wide_integers_survive_a_round_trip(self):
+        sdk_config.json_backend = JSONBackend.AUTO
+        for n in (2**64, -(2**63) - 1, 2**64 - 1):
+            self.assertEqual({"n": n}, json_loads(json_dumps({"n": n})))
+
+    def test_missing_orjson_falls_back_to_stdlib(self):
+        with patch.object(json_backend, "orjson", None):
+            self.assertEqual(ENTRY, json_loads(json_dumps(ENTRY)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,6 @@
 import os
+import subprocess
+import sys
 import unittest
 from io import StringIO
 from pathlib import Path
@@ -63,6 +65,54 @@ class TestStringMethods(unittest.TestCase):
     def test_version(self):
         pass
 
+    def test_subcommands_imported_when_invoked(self):
+        code = (
+            "import sys\n"
+            "from typer.testing import CliRunner\n"
+            "from zanshincli.main import main_app\n"
+            "CliRunner().invoke(main_app, ['--no-verbose', 'version'])\n"
+            "loaded = 'src.bin.scan_target' in sys.modules\n"
+            "CliRunner().invoke(main_app, ['organization', 'scan_target', '--help'])\n"
+            "print(loaded, 'src.bin.scan_target' in sys.modules)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).parent.parent,
+        )
+        self.assertEqual("False True", result.stdout.strip(), result.stderr)
+
+    def test_completion_does_not_import_subcommands(self):
+        code = (
+            "import sys\n"
+            "from zanshincli.main import main_app\n"
+            "try:\n"
+            "    main_app(prog_name='zanshin')\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "print(sorted(m for m in sys.modules if m.startswith('src.bin.') or m == 'boto3'))"
+        )
+
+        def complete(words: str) -> str:
+            env = {
+                **os.environ,
+                "_ZANSHIN_COMPLETE": "complete_bash",
+                "COMP_WORDS": words,
+                "COMP_CWORD": str(len(words.split())),
+            }
+            result = subprocess.run(
+                [sys.executable, "-c", code],
+                capture_output=True,
+                text=True,
+                cwd=Path(__file__).parent.parent,
+                env=env,
+            )
+            return result.stdout.strip().splitlines()[-1]
+
+        self.assertEqual("[]", complete("zanshin "))
+        self.assertEqual("['src.bin.organization']", complete("zanshin organization "))
+
     """
     Commenting tests as those pass on local machine but fails on github actions
     """
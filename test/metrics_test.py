@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from typer.testing import CliRunner
+
+from src.lib.metrics import format_metrics
+from src.lib.timings import Timings
+from src.main import main_app
+
+runner = CliRunner(mix_stderr=False)
+
+
+class TestMetrics(unittest.TestCase):
+    def test_formats_counts_and_latency_histogram(self):
+        timings = Timings()
+        timings.latencies = [0.03, 0.2, 3.0]
+        timings.record_retry()
+        timings.written = 2048
+        lines = format_metrics(timings, 42, "alert list").splitlines()
+        self.assertIn('zanshin_run_entries{command="alert list"} 42', lines)
+        self.assertIn('zanshin_run_api_requests{command="alert list"} 3', lines)
+        self.assertIn('zanshin_run_api_retries{command="alert list"} 1', lines)
+        self.assertIn('zanshin_run_output_bytes{command="alert list"} 2048', lines)
+        self.assertIn("# TYPE zanshin_api_request_duration_seconds histogram", lines)
+        self.assertIn(
+            'zanshin_api_request_duration_seconds_bucket{command="alert list",le="0.25"} 2',
+            lines,
+        )
+        self.assertIn(
+            'zanshin_api_request_duration_seconds_bucket{command="alert list",le="+Inf"} 3',
+            lines,
+        )
+        self.assertIn(
+            'zanshin_api_request_duration_seconds_count{command="alert list"} 3', lines
+        )
+
+    def test_metrics_file_written_on_close(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "zanshin.prom"
+            result = runner.invoke(main_app, ["--metrics-file", str(path), "version"])
+            self.assertEqual(0, result.exit_code, result.stderr)
+            self.assertIn(
+                'zanshin_run_duration_seconds{command="version"}', path.read_text()
+            )
+            self.assertEqual(0o644, os.stat(path).st_mode & 0o777)
+            self.assertEqual(["zanshin.prom"], os.listdir(tmp))
+
+    def test_failed_run_keeps_last_success(self):
+        def invoke(path: Path, client: MagicMock):
+            with patch("src.bin.organization.get_client", return_value=client):
+                return runner.invoke(
+                    main_app, ["--metrics-file", str(path), "organization", "list"]
+                )
+
+        def sample(path: Path, name: str) -> str:
+            prefix = f'{name}{{command="organization list"}} '
+            lines = path.read_text().splitlines()
+            return next(
+                line[len(prefix) :] for line in lines if line.startswith(prefix)
+            )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "zanshin.prom"
+            client = MagicMock()
+            client.iter_organizations.return_value = iter([])
+            self.assertEqual(0, invoke(path, client).exit_code)
+            self.assertEqual("1", sample(path, "zanshin_run_success"))
+            last_success = sample(path, "zanshin_run_last_success_timestamp_seconds")
+
+            client.iter_organizations.side_effect = RuntimeError("API error")
+            self.assertEqual(1, invoke(path, client).exit_code)
+            self.assertEqual("0", sample(path, "zanshin_run_success"))
+            self.assertEqual("1", sample(path, "zanshin_run_exit_code"))
+            self.assertEqual(
+                last_success,
+                sample(path, "zanshin_run_last_success_timestamp_seconds"),
+            )
+            self.assertNotEqual(
+                last_success, sample(path, "zanshin_run_end_timestamp_seconds")
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
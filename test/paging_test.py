@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import patch
+
+import httpx
+from typer.testing import CliRunner
+
+from src.lib.paging import AdaptivePageSize, history_page, iter_entries
+from src.main import main_app
+
+
+def server_error(status_code=503):
+    request = httpx.Request("POST", "https://api.zanshin.tenchisecurity.com/alerts")
+    return httpx.HTTPStatusError(
+        "error", request=request, response=httpx.Response(status_code, request=request)
+    )
+
+
+class TestAdaptivePageSize(unittest.TestCase):
+    def fetch(self, tuner, latencies, errors=()):
+        """Requests a page taking the given time per request, failing the first requests with errors."""
+        sizes = []
+        errors = list(errors)
+
+        def fetch_page(cursor, page_size):
+            sizes.append(page_size)
+            if errors:
+                raise errors.pop(0)
+            return {"data": [], "cursor": cursor}
+
+        with patch("src.lib.paging.perf_counter", side_effect=latencies):
+            tuner.fetch(fetch_page, "c")
+        return sizes
+
+    def test_grows_while_fast_and_shrinks_when_slow(self):
+        tuner = AdaptivePageSize(100, target_latency=2.0)
+        self.fetch(tuner, [0.0, 0.5])
+        self.assertEqual(200, tuner.size)
+        self.fetch(tuner, [0.0, 1.5])
+        self.assertEqual(200, tuner.size)
+        self.fetch(tuner, [0.0, 3.0])
+        self.assertEqual(100, tuner.size)
+
+    def test_stays_within_bounds(self):
+        tuner = AdaptivePageSize(800, minimum=50, maximum=1000)
+        self.fetch(tuner, [0.0, 0.1])
+        self.assertEqual(1000, tuner.size)
+
+    def test_retries_smaller_pages_on_server_errors(self):
+        tuner = AdaptivePageSize(400)
+        sizes = self.fetch(
+            tuner,
+            [0.0, 0.0, 0.0, 1.5],
+            [server_error(), httpx.ReadTimeout("timeout")],
+        )
+        self.assertEqual([400, 200, 100], sizes)
+
+    def test_does_not_retry_client_errors(self):
+        with self.assertRaises(httpx.HTTPStatusError):
+            self.fetch(AdaptivePageSize(400), [0.0], [server_error(400)])
+
+
+class TestHistoryPage(unittest.TestCase):
+    def test_walks_history_by_entry_cursor(self):
+        pages = {
+            None: [{"cursor": "a"}, {"cursor": "b"}],
+            "b": [{"cursor": "c"}],
+            "c": [],
+        }
+        entries = iter_entries(lambda cursor: history_page({"data": pages[cursor]}))
+        self.assertEqual(["a", "b", "c"], [entry["cursor"] for entry in entries])
+
+
+class TestPageSizeOption(unittest.TestCase):
+    def test_rejects_page_sizes_over_the_maximum(self):
+        runner = CliRunner()
+        result = runner.invoke(main_app, ["--page-size", "1001", "version"])
+        self.assertEqual(2, result.exit_code)
+        self.assertIn("--page-size", result.output)
+        result = runner.invoke(main_app, ["--page-size", "1000", "version"])
+        self.assertEqual(0, result.exit_code, result.output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from datetime import timedelta
+
+from src.lib.partition import parse_partition, partitioned, time_windows
+
+ALERTS = [
+    {"id": "a", "severity": "LOW", "createdAt": "2024-01-01T05:00:00.000Z"},
+    {"id": "b", "severity": "CRITICAL", "createdAt": "2024-01-01T23:59:59.999Z"},
+    {"id": "c", "severity": "HIGH", "createdAt": "2024-01-02T00:00:00.000Z"},
+    {"id": "d", "severity": "CRITICAL", "createdAt": "2024-01-02T12:00:00.000Z"},
+    {"id": "e", "severity": "MEDIUM", "createdAt": "2024-01-03T00:00:00.000Z"},
+]
+
+SEVERITY_RANK = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3}
+
+
+def fetch(order, descending=False):
+    """Lists alerts created in an inclusive range, sorted like the API would."""
+
+    def key(alert):
+        return SEVERITY_RANK[alert["severity"]] if order == "severity" else alert[order]
+
+    def window(start, end):
+        selected = [alert for alert in ALERTS if start <= alert["createdAt"] <= end]
+        return iter(sorted(selected, key=key, reverse=descending))
+
+    return window
+
+
+class TestParsePartition(unittest.TestCase):
+    def test_field_and_duration(self):
+        self.assertEqual(
+            ("created_at", timedelta(days=1)), parse_partition("created_at:1d")
+        )
+        self.assertEqual(
+            ("updated_at", timedelta(hours=12)), parse_partition("updated_at:12h")
+        )
+
+    def test_invalid(self):
+        for spec in ("created_at", "created_at:0d", "created_at:1y", "state:1d"):
+            with self.assertRaises(ValueError):
+                parse_partition(spec)
+
+
+class TestTimeWindows(unittest.TestCase):
+    def test_consecutive_windows(self):
+        self.assertEqual(
+            [
+                ("2024-01-01T00:00:00.000Z", "2024-01-02T00:00:00.000Z"),
+                ("2024-01-02T00:00:00.000Z", "2024-01-02T12:00:00.000Z"),
+            ],
+            time_windows("2024-01-01", "2024-01-02T12:00:00", timedelta(days=1)),
+        )
+
+
+class TestPartitioned(unittest.TestCase):
+    WINDOWS = time_windows("2024-01-01", "2024-01-03", timedelta(hours=12))
+
+    def list(self, order, descending=False):
+        return [
+            alert["id"]
+            for alert in partitioned(
+                fetch(order, descending),
+                "created_at",
+                self.WINDOWS,
+                order,
+                descending,
+                3,
+            )
+        ]
+
+    def test_concatenates_windows_ordered_on_the_partition_field(self):
+        self.assertEqual(["a", "b", "c", "d", "e"], self.list("createdAt"))
+        self.assertEqual(["e", "d", "c", "b", "a"], self.list("createdAt", True))
+
+    def test_merges_windows_ordered_on_another_field(self):
+        self.assertEqual(["b", "d", "c", "e", "a"], self.list("severity"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import time
+import unittest
+
+from src.lib.pipeline import map_ordered, merge, prefetch, prefetch_pages
+
+
+class TestPrefetch(unittest.TestCase):
+    def test_preserves_order(self):
+        entries = [{"i": i} for i in range(250)]
+        self.assertEqual(entries, list(prefetch(iter(entries), 2, batch_size=7)))
+
+    def test_reraises_iterator_errors(self):
+        def failing():
+            yield {"i": 0}
+            raise ValueError("API error")
+
+        result = []
+        with self.assertRaises(ValueError):
+            for entry in prefetch(failing(), 2):
+                result.append(entry)
+        self.assertEqual([{"i": 0}], result)
+
+    def test_reads_ahead_at_most_max_batches(self):
+        fetched = []
+
+        def source():
+            for i in range(100):
+                fetched.append(i)
+                yield {"i": i}
+
+        it = prefetch(source(), 2, batch_size=5)
+        next(it)
+        time.sleep(0.2)
+        # one batch being consumed, two queued and one waiting to be queued
+        self.assertLessEqual(len(fetched), 20)
+        it.close()
+
+
+class TestPrefetchPages(unittest.TestCase):
+    PAGES = {
+        None: {"data": [{"i": 0}, {"i": 1}], "cursor": "a"},
+        "a": {"data": [{"i": 2}], "cursor": "b"},
+        "b": {"data": [{"i": 3}]},
+    }
+
+    def test_walks_all_pages_in_order(self):
+        requested = []
+
+        def fetch_page(cursor):
+            requested.append(cursor)
+            return self.PAGES[cursor]
+
+        result = list(prefetch_pages(fetch_page, 2))
+        self.assertEqual([{"i": i} for i in range(4)], result)
+        self.assertEqual([None, "a", "b"], requested)
+
+    def test_resumes_from_cursor(self):
+        result = list(prefetch_pages(self.PAGES.get, 1, cursor="a"))
+        self.assertEqual([{"i": 2}, {"i": 3}], result)
+
+    def test_stops_requesting_pages_at_the_limit(self):
+        requested = []
+
+        def fetch_page(cursor):
+            requested.append(cursor)
+            return self.PAGES[cursor]
+
+        result = list(prefetch_pages(fetch_page, 3, limit=2))
+        self.assertEqual([{"i": 0}, {"i": 1}], result)
+        self.assertEqual([None], requested)
+
+
+class TestMapOrdered(unittest.TestCase):
+    def test_preserves_order(self):
+        def slow_square(i):
+            time.sleep(0.001 * (i % 3))
+            return i * i
+
+        self.assertEqual(
+            [i * i for i in range(50)], list(map_ordered(slow_square, range(50), 4))
+        )
+
+    def test_bounds_items_in_flight(self):
+        pulled = []
+
+        def source():
+            for i in range(100):
+                pulled.append(i)
+                yield i
+
+        it = map_ordered(lambda i: i, source(), 3)
+        self.assertEqual(0, next(it))
+        self.assertLessEqual(len(pulled), 6)
+        it.close()
+
+
+class TestMerge(unittest.TestCase):
+    def test_yields_every_item_in_order_per_iterator(self):
+        merged = list(merge([iter(range(20)), iter(range(100, 130)), iter([])], 4))
+        self.assertEqual(50, len(merged))
+        for index, expected in ((0, list(range(20))), (1, list(range(100, 130)))):
+            self.assertEqual(expected, [item for i, item in merged if i == index])
+
+    def test_reraises_iterator_errors(self):
+        def failing():
+            yield 1
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            list(merge([iter(range(10)), failing()], 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
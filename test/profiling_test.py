@@ -0,0 +1,30 @@
+import pstats
+import tempfile
+import unittest
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+from src.main import main_app
+
+runner = CliRunner(mix_stderr=False)
+
+
+class TestProfiling(unittest.TestCase):
+    def test_cpu_profile_written_on_close(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "zanshin.prof"
+            result = runner.invoke(main_app, ["--profile-cpu", str(path), "version"])
+            self.assertEqual(0, result.exit_code, result.stderr)
+            self.assertTrue(pstats.Stats(str(path)).total_calls > 0)
+
+    def test_memory_profile_reports_peak_and_allocation_sites(self):
+        result = runner.invoke(main_app, ["--no-verbose", "--profile-mem", "version"])
+        self.assertEqual(0, result.exit_code, result.stderr)
+        lines = result.stderr.splitlines()
+        self.assertTrue(lines[0].startswith("zanshin: peak memory"))
+        self.assertGreater(len(lines), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import src.config.sdk as sdk_config
+from src.lib.models import OutputFormat
+from src.lib.timings import Timings
+from src.lib.utils import output_iterable
+
+
+class TestTimings(unittest.TestCase):
+    def tearDown(self):
+        sdk_config.timings = None
+
+    def test_splits_waiting_writing_and_other(self):
+        def slow_entries():
+            for i in range(3):
+                time.sleep(0.01)
+                yield {"id": str(i)}
+
+        sdk_config.format = OutputFormat.JSONL
+        sdk_config.limit = None
+        sdk_config.timings = timings = Timings()
+        with patch("sys.stdout", new=StringIO()):
+            output_iterable(slow_entries())
+        self.assertGreaterEqual(timings.waiting, 0.03)
+        self.assertGreater(timings.writing, 0)
+        self.assertGreaterEqual(timings.output, timings.waiting + timings.writing)
+
+    def test_waiting_for_prefetched_entries(self):
+        def slow_entries():
+            for i in range(3):
+                time.sleep(0.01)
+                yield {"id": str(i)}
+
+        sdk_config.format = OutputFormat.JSONL
+        sdk_config.limit = None
+        sdk_config.prefetch_batches = 2
+        sdk_config.timings = timings = Timings()
+        try:
+            with patch("sys.stdout", new=StringIO()):
+                output_iterable(slow_entries())
+        finally:
+            sdk_config.prefetch_batches = 0
+        # entries are fetched on another thread, the output waits for them on the queue
+        self.assertGreaterEqual(timings.waiting, 0.03)
+        self.assertAlmostEqual(
+            timings.output, timings.waiting + timings.writing + timings.other
+        )
+        self.assertTrue(
+            any(line.startswith("other output time") for line in timings.report(3))
+        )
+
+    def test_records_output_time_when_output_fails(self):
+        def failing_entries():
+            yield {"id": "0"}
+            time.sleep(0.01)
+            raise RuntimeError("API error")
+
+        sdk_config.format = OutputFormat.JSONL
+        sdk_config.limit = None
+        sdk_config.timings = timings = Timings()
+        with patch("sys.stdout", new=StringIO()):
+            with self.assertRaises(RuntimeError):
+                output_iterable(failing_entries())
+        self.assertGreaterEqual(timings.waiting, 0.01)
+        self.assertGreaterEqual(timings.output, timings.waiting)
+
+    def test_adds_waiting_time_of_concurrent_outputs(self):
+        def slow_entries():
+            for i in range(5):
+                time.sleep(0.01)
+                yield i
+
+        timings = Timings()
+        with ThreadPoolExecutor(4) as executor:
+            for _ in range(4):
+                executor.submit(lambda: list(timings.timed(slow_entries())))
+        self.assertGreaterEqual(timings.waiting, 4 * 5 * 0.01)
+
+    def test_records_request_latencies(self):
+        timings = Timings()
+        client = SimpleNamespace(_request=lambda method, path: time.sleep(0.01))
+        timings.instrument(client)
+        client._request("GET", "/me")
+        client._request("GET", "/me")
+        self.assertEqual(2, len(timings.latencies))
+        report = timings.report(10)
+        self.assertTrue(report[0].startswith("10 object(s) in "))
+        self.assertTrue(report[-1].startswith("API requests        2 taking "))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,213 @@
+import time
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+import typer
+
+import src.config.sdk as sdk_config
+from src.lib.models import OutputFormat
+from src.lib.output import OutputSink
+from src.lib.utils import output_iterable
+
+
+class TestOutputIterable(unittest.TestCase):
+    ###################################################
+    # Set up
+    ###################################################
+
+    def setUp(self):
+        sdk_config.format = OutputFormat.JSON
+        sdk_config.csv_columns = None
+        sdk_config.limit = None
+        sdk_config.entries = 0
+
+    def output(self, entries):
+        with patch("sys.stdout", new=StringIO()) as output:
+            output_iterable(iter(entries))
+            return output.getvalue()
+
+    ###################################################
+    # JSON Lines
+    ###################################################
+
+    def test_jsonl_one_compact_object_per_line(self):
+        sdk_config.format = OutputFormat.JSONL
+        out = self.output([{"id": "1", "tags": ["a", "b"]}, {"id": "2"}])
+        self.assertEqual('{"id":"1","tags":["a","b"]}\n{"id":"2"}\n', out)
+
+    ###################################################
+    # CSV
+    ###################################################
+
+    def test_csv_infers_columns_including_late_keys(self):
+        sdk_config.format = OutputFormat.CSV
+        out = self.output(
+            [
+                {"b": 1, "a": "x"},
+                {"a": "y", "b": 2, "c": ["p", "q"]},
+                {"a": "z"},
+            ]
+        )
+        self.assertEqual(
+            'a,b,c\r\nx,1,\r\ny,2,"p, q"\r\nz,,\r\n',
+            out,
+        )
+        self.assertEqual(3, sdk_config.entries)
+
+    def test_csv_declared_columns(self):
+        sdk_config.format = OutputFormat.CSV
+        sdk_config.csv_columns = ["id", "state"]
+        out = self.output(
+            [
+                {"id": "1", "state": "OPEN", "extra": True},
+                {"id": "2"},
+            ]
+        )
+        self.assertEqual("id,state\r\n1,OPEN\r\n2,\r\n", out)
+
+    ###################################################
+    # Count
+    ###################################################
+
+    def test_count_only_outputs_number_of_entries(self):
+        sdk_config.format = OutputFormat.COUNT
+        self.assertEqual("3\n", self.output([{"id": "1"}, {"id": "2"}, {"id": "3"}]))
+        self.assertEqual(3, sdk_config.entries)
+
+    def test_count_does_not_save_progress(self):
+        sdk_config.format = OutputFormat.COUNT
+        saved = []
+        with patch("sys.stdout", new=StringIO()) as output:
+            output_iterable(
+                iter([{"id": "1"}, {"id": "2"}]), None, lambda: saved.append(True)
+            )
+        self.assertEqual("2\n", output.getvalue())
+        self.assertEqual([], saved)
+
+    ###################################################
+    # Limit
+    ###################################################
+
+    def test_limit_stops_pulling_entries(self):
+        sdk_config.format = OutputFormat.JSONL
+        sdk_config.limit = 2
+        pulled = []
+
+        def entries():
+            for i in range(10):
+                pulled.append(i)
+                yield {"id": str(i)}
+
+        with patch("sys.stdout", new=StringIO()) as output:
+            output_iterable(entries())
+        self.assertEqual('{"id":"0"}\n{"id":"1"}\n', output.getvalue())
+        self.assertEqual([0, 1], pulled)
+
+    ###################################################
+    # Checkpoints
+    ###################################################
+
+    def test_checkpoint_after_output_is_written(self):
+        sdk_config.format = OutputFormat.JSONL
+        written = []
+        with patch("sys.stdout", new=StringIO()) as output:
+            output_iterable(
+                iter([{"id": str(i)} for i in range(5)]),
+                None,
+                lambda: written.append(output.getvalue().count("\n")),
+                checkpoint_every=2,
+            )
+        self.assertEqual([2, 4, 5], written)
+
+    def test_checkpoint_after_spilled_csv_is_written(self):
+        sdk_config.format = OutputFormat.CSV
+        written = []
+        with patch("sys.stdout", new=StringIO()) as output:
+            output_iterable(
+                iter([{"id": str(i)} for i in range(5)]),
+                None,
+                lambda: written.append(output.getvalue().count("\n")),
+                checkpoint_every=2,
+            )
+        self.assertEqual([6], written)
+
+
+class BrokenPipe(StringIO):
+    def write(self, data):
+        raise BrokenPipeError()
+
+
+class Terminal(StringIO):
+    def isatty(self):
+        return True
+
+
+class TestOutputIterablePrefetch(unittest.TestCase):
+    def setUp(self):
+        sdk_config.format = OutputFormat.JSONL
+        sdk_config.limit = 1000
+        sdk_config.prefetch_batches = 2
+        sdk_config.buffer_size = 0
+
+    def tearDown(self):
+        sdk_config.limit = None
+        sdk_config.prefetch_batches = 0
+        sdk_config.buffer_size = None
+
+    def test_failed_output_stops_reading_ahead_before_closing_source(self):
+        closed = []
+
+        def slow_entries():
+            try:
+                for i in range(10000):
+                    time.sleep(0.001)
+                    yield {"id": str(i)}
+            finally:
+                closed.append(True)
+
+        with self.assertRaises(typer.Exit):
+            output_iterable(slow_entries(), file=BrokenPipe())
+        self.assertEqual([True], closed)
+
+
+class TestOutputSink(unittest.TestCase):
+    def test_writes_in_chunks(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            with OutputSink(buffer_size=10) as sink:
+                sink.writeline("12345")
+                self.assertEqual("", output.getvalue())
+                sink.writeline("67890")
+                self.assertEqual("12345\n67890\n", output.getvalue())
+                sink.writeline("end")
+            self.assertEqual("12345\n67890\nend\n", output.getvalue())
+
+    def test_terminal_output_is_not_buffered(self):
+        with patch("sys.stdout", new=Terminal()) as output:
+            with OutputSink() as sink:
+                sink.writeline("shown")
+                self.assertEqual("shown\n", output.getvalue())
+
+    def test_piped_output_is_buffered(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            with OutputSink() as sink:
+                sink.writeline("held")
+                self.assertEqual("", output.getvalue())
+            self.assertEqual("held\n", output.getvalue())
+
+    def test_exits_quietly_on_broken_pipe(self):
+        with patch("sys.stdout", new=BrokenPipe()):
+            with self.assertRaises(typer.Exit):
+                with OutputSink(buffer_size=0) as sink:
+                    sink.writeline("lost")
+
+    def test_broken_file_leaves_stdout_alone(self):
+        with patch("src.lib.output._silence_stdout") as silence:
+            with self.assertRaises(typer.Exit):
+                with OutputSink(buffer_size=0, file=BrokenPipe()) as sink:
+                    sink.writeline("lost")
+        silence.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
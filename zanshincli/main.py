@@ -2,33 +2,27 @@ import logging
 import sys
 from configparser import RawConfigParser
 from datetime import timedelta
+from pathlib import Path
 from stat import S_IRUSR, S_IWUSR
 from sys import stderr
 from sys import version as python_version
 from time import perf_counter
+from typing import List, Optional
 
 import typer
 from typer import Typer
 from zanshinsdk import __version__ as sdk_version
 from zanshinsdk.client import CONFIG_DIR, CONFIG_FILE
 
-import src.bin.account as account
-import src.bin.alerts as alerts
-import src.bin.api_key as api_key
-import src.bin.follower as follower
-import src.bin.follower_request as follower_request
-import src.bin.following as following
-import src.bin.following_request as following_request
-import src.bin.invites as invites
-import src.bin.member as organization_member
-import src.bin.member_invite as member_invite
-import src.bin.organization as organization
-import src.bin.scan as scan
-import src.bin.scan_target as scan_target
-import src.bin.scan_target_groups as scan_target_groups
-import src.bin.summary as summary
 import src.config.sdk as sdk_config
-from src.lib.models import OutputFormat
+from src.lib.json_backend import orjson_available
+from src.lib.lazy import COMMAND_PATH, LazyTyper, lazy_group_class
+from src.lib.metrics import exit_code, write_metrics
+from src.lib.models import JSONBackend, OutputFormat
+from src.lib.output import DEFAULT_BUFFER_SIZE
+from src.lib.paging import MAX_PAGE_SIZE
+from src.lib.profiling import start_cpu_profile, start_memory_profile
+from src.lib.timings import Timings
 from src.lib.version import __version__ as cli_version
 
 ###################################################
@@ -46,7 +40,90 @@ sys.excepthook = zanshin_exchanger
 # Main App
 ###################################################
 
-main_app: Typer = typer.Typer(name="zanshin", no_args_is_help=True)
+# Sub-apps are only imported when invoked, so that commands don't pay for importing the dependencies of all others
+# (e.g. boto3 for scan targets)
+SUBCOMMANDS = {
+    "account": LazyTyper(
+        "src.bin.account",
+        "Operations on user the API key owner has direct access to",
+        {
+            "invites": LazyTyper(
+                "src.bin.invites",
+                "Operations on invites from account the API key owner has direct access to",
+            ),
+            "api_key": LazyTyper(
+                "src.bin.api_key",
+                "Operations on API keys from account the API key owner has direct access to",
+            ),
+        },
+    ),
+    "organization": LazyTyper(
+        "src.bin.organization",
+        "Operations on organizations the API key owner has direct access to",
+        {
+            "member": LazyTyper(
+                "src.bin.member",
+                "Operations on members of organization the API key owner has direct access to",
+                {
+                    "invite": LazyTyper(
+                        "src.bin.member_invite",
+                        "Operations on member invites of organization the API key owner has direct"
+                        "access to",
+                    ),
+                },
+            ),
+            "follower": LazyTyper(
+                "src.bin.follower",
+                "Operations on followers of organization the API key owner has direct access to",
+                {
+                    "request": LazyTyper(
+                        "src.bin.follower_request",
+                        "Operations on follower requests of organization the API key owner has direct"
+                        "access to",
+                    ),
+                },
+            ),
+            "following": LazyTyper(
+                "src.bin.following",
+                "Operations on following of organization the API key owner has direct access to",
+                {
+                    "request": LazyTyper(
+                        "src.bin.following_request",
+                        "Operations on following requests of organization the API key owner has"
+                        "direct access to",
+                    ),
+                },
+            ),
+            "scan_target": LazyTyper(
+                "src.bin.scan_target",
+                "Operations on scan targets from organizations the API key owner has direct access to",
+                {
+                    "scan": LazyTyper(
+                        "src.bin.scan",
+                        "Operations on scan targets from organizations the API key owner has direct"
+                        " access to",
+                    ),
+                },
+            ),
+            "scan-target-groups": LazyTyper(
+                "src.bin.scan_target_groups",
+                "Operations on organizations scan target groups the API key owner has direct access to",
+            ),
+        },
+    ),
+    "alert": LazyTyper(
+        "src.bin.alerts",
+        "Operations on alerts the API key owner has direct access to",
+    ),
+    "summary": LazyTyper(
+        "src.bin.summary",
+        "Operations on summaries the API key owner has direct access to",
+    ),
+}
+
+main_app: Typer = typer.Typer(
+    name="zanshin", no_args_is_help=True, cls=lazy_group_class(SUBCOMMANDS)
+)
 
 
 @main_app.callback()
@@ -62,6 +139,68 @@ def global_options_callback(
         help="Output format to use for list operations",
         case_sensitive=False,
     ),
+    csv_columns: Optional[List[str]] = typer.Option(
+        None,
+        "--csv-column",
+        help="Column to output in CSV format, may be repeated. When given, rows are streamed as they arrive using "
+        "only these columns, otherwise columns are inferred from the data",
+    ),
+    json_backend: JSONBackend = typer.Option(
+        JSONBackend.AUTO,
+        help="JSON encoder to use: auto picks orjson when installed for compact output, orjson also uses it for "
+        "indented output (with two-space indentation)",
+        case_sensitive=False,
+    ),
+    buffer_size: Optional[int] = typer.Option(
+        None,
+        min=0,
+        help="Number of characters of output to buffer before writing to stdout, 0 writes each entry immediately. "
+        f"Defaults to {DEFAULT_BUFFER_SIZE}, or 0 when writing to a terminal so entries show up as they arrive",
+        show_default=False,
+    ),
+    prefetch_batches: int = typer.Option(
+        0,
+        min=0,
+        help="Fetch up to this many batches of entries in a background thread while output is written, 0 disables "
+        "prefetching",
+    ),
+    page_size: Optional[str] = typer.Option(
+        None,
+        help="Number of entries to request per page in list operations that support it, up to 1000, or auto to "
+        "adjust it to the response time of the API, growing it while pages are fast and shrinking it on timeouts and "
+        "server errors",
+    ),
+    limit: Optional[int] = typer.Option(
+        None,
+        min=1,
+        help="Output at most this many entries, without requesting further pages once they were output. Windows of "
+        "--partition-by and shards of --shards are listed in parallel, so each may request up to this many entries",
+    ),
+    profile_cpu: Optional[Path] = typer.Option(
+        None,
+        dir_okay=False,
+        help="Profile the command with cProfile and write the statistics to this file, in the pstats format. Only "
+        "the main thread is profiled",
+    ),
+    profile_mem: bool = typer.Option(
+        False,
+        "--profile-mem",
+        help="Trace memory allocations with tracemalloc and print the peak usage and the top allocation sites to "
+        "stderr",
+    ),
+    timings: bool = typer.Option(
+        False,
+        "--timings",
+        help="Print to stderr how the time was split between waiting for entries, writing output and the rest of "
+        "the output time, mostly formatting, with the latency of API requests and the throughput",
+    ),
+    metrics_file: Optional[Path] = typer.Option(
+        None,
+        dir_okay=False,
+        help="Write statistics of the run to this file when it ends, in the Prometheus text format read by the "
+        "textfile collector of the node exporter: duration, exit status, time of the last success, entries "
+        "processed, API requests, retries, bytes written and a histogram of API request latencies",
+    ),
     verbose: bool = typer.Option(True, help="Print more information to stderr"),
     debug: bool = typer.Option(False, help="Enable debug logging in the SDK"),
 ):
@@ -70,6 +209,7 @@ def global_options_callback(
     (https://tenchisecurity.com), go to https://github.com/tenchi-security/zanshin-cli for license, source code and
     documentation
     """
+    sdk_config.entries = 0
     if verbose:
         # print summary of data processed and elapsed time at the end of the execution
         start_time = perf_counter()
@@ -83,6 +223,35 @@ def global_options_callback(
 
         ctx.call_on_close(print_elapsed_time)
 
+    sdk_config.timings = Timings() if timings or metrics_file else None
+    if timings:
+
+        def print_timings():
+            for line in sdk_config.timings.report(sdk_config.entries):
+                typer.echo(f"zanshin: {line}", err=True)
+
+        ctx.call_on_close(print_timings)
+
+    if metrics_file:
+
+        def save_metrics():
+            command = " ".join(ctx.meta.get(COMMAND_PATH, []))
+            write_metrics(
+                metrics_file,
+                sdk_config.timings,
+                sdk_config.entries,
+                command,
+                exit_code(),
+            )
+
+        ctx.call_on_close(save_metrics)
+
+    if profile_cpu:
+        ctx.call_on_close(start_cpu_profile(profile_cpu))
+
+    if profile_mem:
+        ctx.call_on_close(start_memory_profile())
+
     if debug:
         logger = logging.getLogger("zanshinsdk")
         logger.setLevel(logging.DEBUG)
@@ -93,10 +262,32 @@ def global_options_callback(
         handler.setFormatter(formatter)
         logger.addHandler(handler)
 
+    if json_backend is JSONBackend.ORJSON and not orjson_available():
+        raise typer.BadParameter(
+            "orjson is not installed, install it or use another backend",
+            param_hint="--json-backend",
+        )
+
+    if page_size is None or page_size == "auto":
+        sdk_config.page_size = None
+    elif page_size.isdigit() and 0 < int(page_size) <= MAX_PAGE_SIZE:
+        sdk_config.page_size = int(page_size)
+    else:
+        raise typer.BadParameter(
+            f"must be an integer from 1 to {MAX_PAGE_SIZE} or auto",
+            param_hint="--page-size",
+        )
+    sdk_config.auto_page_size = page_size == "auto"
+
     sdk_config.debug = debug
     sdk_config.verbose = verbose
     sdk_config.profile = profile
     sdk_config.format = output_format
+    sdk_config.csv_columns = csv_columns
+    sdk_config.json_backend = json_backend
+    sdk_config.buffer_size = buffer_size
+    sdk_config.prefetch_batches = prefetch_batches
+    sdk_config.limit = limit
 
 
 @main_app.command()
@@ -135,174 +326,5 @@ def version():
     typer.echo(f"Python {python_version}")
 
 
-###################################################
-# Account App
-###################################################
-
-main_app.add_typer(
-    account.app,
-    name="account",
-    help="Operations on user the API key owner has direct access to",
-)
-
-
-###################################################
-# Account Invites App
-###################################################
-
-account.app.add_typer(
-    invites.app,
-    name="invites",
-    help="Operations on invites from account the API key owner has direct access to",
-)
-
-
-###################################################
-# Account API key App
-###################################################
-
-account.app.add_typer(
-    api_key.app,
-    name="api_key",
-    help="Operations on API keys from account the API key owner has direct access to",
-)
-
-
-###################################################
-# Organization App
-###################################################
-
-main_app.add_typer(
-    organization.app,
-    name="organization",
-    help="Operations on organizations the API key owner has direct access to",
-)
-
-
-###################################################
-# Organization Member App
-###################################################
-
-organization.app.add_typer(
-    organization_member.app,
-    name="member",
-    help="Operations on members of organization the API key owner has direct access to",
-)
-
-
-###################################################
-# Organization Member Invite App
-###################################################
-
-organization_member.app.add_typer(
-    member_invite.app,
-    name="invite",
-    help="Operations on member invites of organization the API key owner has direct"
-    "access to",
-)
-
-
-###################################################
-# Organization Follower App
-###################################################
-
-organization.app.add_typer(
-    follower.app,
-    name="follower",
-    help="Operations on followers of organization the API key owner has direct access to",
-)
-
-
-###################################################
-# Organization Follower Request App
-###################################################
-
-follower.app.add_typer(
-    follower_request.app,
-    name="request",
-    help="Operations on follower requests of organization the API key owner has direct"
-    "access to",
-)
-
-
-###################################################
-# Organization Following App
-###################################################
-
-organization.app.add_typer(
-    following.app,
-    name="following",
-    help="Operations on following of organization the API key owner has direct access to",
-)
-
-
-###################################################
-# Organization Following Request App
-###################################################
-
-following.app.add_typer(
-    following_request.app,
-    name="request",
-    help="Operations on following requests of organization the API key owner has"
-    "direct access to",
-)
-
-
-###################################################
-# Organization Scan Target App
-###################################################
-
-organization.app.add_typer(
-    scan_target.app,
-    name="scan_target",
-    help="Operations on scan targets from organizations the API key owner has direct access to",
-)
-
-
-###################################################
-# Organization Scan Target Scan App
-###################################################
-
-scan_target.app.add_typer(
-    scan.app,
-    name="scan",
-    help="Operations on scan targets from organizations the API key owner has direct"
-    " access to",
-)
-
-
-###################################################
-# Scan Target Groups App
-###################################################
-
-organization.app.add_typer(
-    scan_target_groups.app,
-    name="scan-target-groups",
-    help="Operations on organizations scan target groups the API key owner has direct access to",
-)
-
-
-###################################################
-# Alert
-###################################################
-
-main_app.add_typer(
-    alerts.app,
-    name="alert",
-    help="Operations on alerts the API key owner has direct access to",
-)
-
-
-###################################################
-# Summary
-###################################################
-
-main_app.add_typer(
-    summary.app,
-    name="summary",
-    help="Operations on summaries the API key owner has direct access to",
-)
-
-
 if __name__ == "__main__":
     main_app()